@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Benchmark do bot inteiro com o Google Sheets e a API do Telegram simulados
+(benchmarks/fake_sheets.py e benchmarks/fake_telegram.py), com latência e
+erros de cota configuráveis. Para cada tamanho de livro-caixa sintético mede:
+
+- expense: despesas enviadas ao handle_expense até todas estarem na planilha;
+- statistics: /statistics completo (leitura, DataFrame, gráficos e envio),
+  com uma despesa nova antes de cada execução para os gráficos mudarem;
+- webhook: POSTs no /webhook do servidor aiohttp até todas as updates serem
+  processadas.
+
+Cada cenário roda em um subprocesso, então o pico de RSS é só dele (inclui a
+planilha simulada em memória). Com --save-baseline os resultados viram a
+referência; com --baseline uma piora acima de --tolerance é apontada e o
+script termina com código 1.
+
+Uso: python benchmarks/bench_bot.py [--sizes 100,10000,100000] [--scenarios expense,statistics,webhook]
+     [--messages 500] [--repeat 5] [--concurrency 20] [--sheets-latency 0.05] [--quota-error-rate 0.01]
+     [--quota-per-minute 60000] [--telegram-latency 0.02] [--save-baseline benchmarks/baseline.json]
+     [--baseline benchmarks/baseline.json] [--tolerance 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import itertools
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ('expense', 'statistics', 'webhook')
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def expense_text(n):
+    return f"{n % 800 + 1}.50 - pix - mercado (bench {n}) - ana"
+
+async def wait_rows(worksheet, target, timeout=300):
+    deadline = time.monotonic() + timeout
+    while worksheet.row_count() < target:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"a planilha tem {worksheet.row_count()} de {target} linhas")
+        await asyncio.sleep(0.01)
+
+async def send_all(send, count, concurrency, ids):
+    """Chama send(update_id) count vezes com concurrency em paralelo; retorna as latências"""
+    latencies = []
+    remaining = iter(range(count))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await send(next(ids))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies
+
+async def run_expense(application, worksheet, args, ids):
+    from telegram import Update
+    from benchmarks.fake_telegram import update_payload
+    from src.main import get_bot_manager
+
+    async def send(update_id):
+        await application.process_update(Update.de_json(update_payload(update_id, expense_text(update_id)), application.bot))
+
+    # Aquecimento: a primeira despesa conecta à planilha e cria o FinanceBotManager
+    target = worksheet.row_count() + 1
+    await send(next(ids))
+    sheets_manager = get_bot_manager().sheets_manager
+    await asyncio.to_thread(sheets_manager.flush)
+    await wait_rows(worksheet, target)
+
+    target += args.messages
+    started = time.perf_counter()
+    latencies = await send_all(send, args.messages, args.concurrency, ids)
+    # Sem o flush o último lote incompleto esperaria SHEETS_BATCH_MAX_AGE parado
+    await asyncio.to_thread(sheets_manager.flush)
+    await wait_rows(worksheet, target)
+    return args.messages, time.perf_counter() - started, latencies, {}
+
+async def run_statistics(application, worksheet, args, ids):
+    from telegram import Update
+    from benchmarks.fake_telegram import update_payload
+
+    latencies = []
+    elapsed = 0.0
+    for i in range(args.repeat):
+        if i:
+            # Uma despesa nova entre as execuções: a leitura incremental e os gráficos são refeitos
+            update_id = next(ids)
+            await application.process_update(Update.de_json(update_payload(update_id, expense_text(update_id)), application.bot))
+        update = Update.de_json(update_payload(next(ids), '/statistics'), application.bot)
+        started = time.perf_counter()
+        await application.process_update(update)
+        latencies.append(time.perf_counter() - started)
+        elapsed += latencies[-1]
+    # A primeira execução inclui a conexão, a leitura completa e o import do pandas/matplotlib
+    cold, warm = latencies[0], latencies[1:] or latencies
+    return len(latencies), elapsed, warm, {'cold_ms': round(cold * 1000, 1)}
+
+async def run_webhook(application, worksheet, args, ids):
+    import aiohttp
+    from aiohttp.test_utils import TestServer
+    from benchmarks.fake_telegram import update_payload
+    from src.webhook import create_web_app
+
+    web_app = create_web_app(application, workers=args.workers, max_queue=args.max_queue)
+    rejected = 0
+    async with TestServer(web_app) as server, aiohttp.ClientSession() as session:
+        webhook_url, health_url = server.make_url('/webhook'), server.make_url('/health')
+
+        async def processed():
+            # Updates que terminaram, com ou sem erro no handler
+            async with session.get(health_url) as response:
+                queue = (await response.json())['update_queue']
+                return queue['processed'] + queue['failed']
+
+        async def send(update_id):
+            nonlocal rejected
+            payload = update_payload(update_id, expense_text(update_id), update_id % args.chats + 1)
+            while True:
+                async with session.post(webhook_url, json=payload) as response:
+                    await response.read()
+                if response.status != 503:
+                    return
+                # Fila cheia: reenvia depois, como o Telegram faz
+                rejected += 1
+                await asyncio.sleep(0.05)
+
+        await send(next(ids))
+        while await processed() < 1:
+            await asyncio.sleep(0.01)
+
+        started = time.perf_counter()
+        latencies = await send_all(send, args.messages, args.concurrency, ids)
+        while await processed() < args.messages + 1:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+    return args.messages, elapsed, latencies, {'rejected': rejected}
+
+RUNNERS = {'expense': run_expense, 'statistics': run_statistics, 'webhook': run_webhook}
+
+def run_scenario(args):
+    """Executado no subprocesso: um cenário com um tamanho de livro-caixa; imprime o resultado em JSON"""
+    directory = tempfile.mkdtemp(prefix='bench-bot-')
+    # logs/bot.log, diário e caches do bot ficam no diretório temporário
+    os.chdir(directory)
+    os.makedirs('logs', exist_ok=True)
+    os.environ.update({
+        'GOOGLE_SHEET_ID': 'bench',
+        'GOOGLE_SHEET_NAME': 'Gastos',
+        'GOOGLE_SERVICE_ACCOUNT_FILE': 'bench.json',
+        'STORAGE_BACKEND': 'sheets',
+        'JOURNAL_PATH': os.path.join(directory, 'journal.jsonl'),
+        'SHEETS_READ_PER_MINUTE': str(args.quota_per_minute),
+        'SHEETS_WRITE_PER_MINUTE': str(args.quota_per_minute),
+    })
+
+    from telegram.ext import Application
+    from benchmarks.fake_sheets import FakeClient, install
+    from benchmarks.fake_telegram import FakeTelegramRequest
+    from benchmarks.synthetic import synthetic_rows
+    from src.storage import HEADERS
+    from src import main as bot
+
+    client = FakeClient(args.sheets_latency, args.quota_error_rate)
+    worksheet = client.add_ledger('bench', 'Gastos', [list(HEADERS)] + synthetic_rows(args.rows))
+    install(client)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    application = (
+        Application.builder()
+        .token('1:bench')
+        .request(FakeTelegramRequest(args.telegram_latency))
+        .get_updates_request(FakeTelegramRequest())
+        .build()
+    )
+    bot.register_handlers(application)
+
+    async def run():
+        ids = itertools.count(1)
+        runner = RUNNERS[args.run]
+        try:
+            if args.run == 'webhook':
+                # O servidor aiohttp inicia e encerra a aplicação do Telegram
+                return await runner(application, worksheet, args, ids)
+            async with application:
+                await application.start()
+                result = await runner(application, worksheet, args, ids)
+                await application.stop()
+                return result
+        finally:
+            await bot.flush_pending_writes(application)
+
+    operations, elapsed, latencies, extra = asyncio.run(run())
+    result = {
+        'scenario': args.run,
+        'rows': args.rows,
+        'operations': operations,
+        'throughput': round(operations / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'quota_errors': client.api.stats()['quota_errors'],
+    }
+    result.update(extra)
+    print(json.dumps(result))
+
+def regressions(result, base, tolerance):
+    """Métricas piores que a referência além da tolerância"""
+    worse = []
+    if result['throughput'] < base['throughput'] * (1 - tolerance):
+        worse.append('throughput')
+    for key in ('p50_ms', 'p99_ms', 'peak_rss_mb'):
+        if result[key] > base[key] * (1 + tolerance):
+            worse.append(key)
+    return worse
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100,10000,100000', help='linhas do livro-caixa sintético, até 1000000')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--messages', type=int, default=500, help='despesas por cenário expense/webhook')
+    parser.add_argument('--repeat', type=int, default=5, help='execuções do /statistics')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--chats', type=int, default=10, help='chats diferentes no cenário webhook')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--max-queue', type=int, default=512)
+    parser.add_argument('--sheets-latency', type=float, default=0.05, help='segundos por requisição ao Sheets')
+    parser.add_argument('--quota-error-rate', type=float, default=0.01, help='fração das requisições com 429')
+    parser.add_argument('--quota-per-minute', type=float, default=60000, help='cota do SheetsScheduler (a do Google é 60)')
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--save-baseline', help='grava os resultados como referência')
+    parser.add_argument('--baseline', help='compara com uma referência gravada antes')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--run', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run_scenario(args)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = {(r['scenario'], r['rows']): r for r in json.load(f)['results']}
+
+    print(
+        f"Sheets simulado com {args.sheets_latency * 1000:.0f} ms e {args.quota_error_rate:.1%} de 429, "
+        f"Telegram com {args.telegram_latency * 1000:.0f} ms, {args.concurrency} em paralelo"
+    )
+    print(f"{'cenário':<11} {'linhas':>8} {'ops/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'RSS (MB)':>9} {'429':>5}  observações")
+    results, regressed = [], []
+    for scenario in args.scenarios.split(','):
+        for rows in [int(size) for size in args.sizes.split(',')]:
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], '--run', scenario, '--rows', str(rows)],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            )
+            lines = child.stdout.strip().splitlines()
+            if child.returncode or not lines:
+                print(f"{scenario:<11} {rows:>8} falhou (código {child.returncode})")
+                continue
+            # Avisos do bot também vão para o stdout; o resultado é a última linha
+            result = json.loads(lines[-1])
+            results.append(result)
+
+            notes = []
+            if 'cold_ms' in result:
+                notes.append(f"primeira execução {result['cold_ms']:.0f} ms")
+            if result.get('rejected'):
+                notes.append(f"{result['rejected']} respostas 503")
+            base = baseline.get((scenario, rows))
+            if base:
+                worse = regressions(result, base, args.tolerance)
+                notes.append(f"PIOROU: {', '.join(worse)}" if worse else "ok com a referência")
+                regressed += [(scenario, rows, key) for key in worse]
+            print(
+                f"{scenario:<11} {rows:>8} {result['throughput']:>8.1f} {result['p50_ms']:>9.1f} "
+                f"{result['p99_ms']:>9.1f} {result['peak_rss_mb']:>9.0f} {result['quota_errors']:>5}  {'; '.join(notes)}"
+            )
+
+    if args.save_baseline:
+        settings = {key: value for key, value in vars(args).items() if key not in ('run', 'rows', 'save_baseline', 'baseline')}
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"Referência gravada em {args.save_baseline}")
+    if regressed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
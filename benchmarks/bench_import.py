@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cold start: tempo para importar src.main em um processo novo,
+com a pilha de gráficos carregada sob demanda, contra o custo da importação
+antiga, que trazia junto src.statistics (pandas, matplotlib e seaborn).
+A conexão com a planilha, que antes também acontecia na importação, não
+entra na conta: ela depende da rede.
+
+Uso: python benchmarks/bench_import.py [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import src.main
+{extra}
+elapsed = time.perf_counter() - started
+heavy = [name for name in ('pandas', 'matplotlib', 'seaborn') if name in sys.modules]
+print(json.dumps({{'elapsed': elapsed, 'heavy': heavy}}))
+"""
+
+SCENARIOS = (
+    ('sob demanda', ''),
+    ('antigo', 'import src.statistics'),
+)
+
+def run(extra, workdir):
+    code = SCRIPT.format(root=ROOT, extra=extra)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=workdir, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # src.main grava em logs/bot.log relativo ao diretório atual
+        os.makedirs(os.path.join(workdir, 'logs'))
+        print(f"{'importação':<12} {'mediana (s)':>12} {'mínimo (s)':>11}  módulos pesados")
+        for name, extra in SCENARIOS:
+            results = [run(extra, workdir) for _ in range(args.repeat)]
+            times = [result['elapsed'] for result in results]
+            heavy = ', '.join(results[-1]['heavy']) or '-'
+            print(f"{name:<12} {statistics.median(times):>12.3f} {min(times):>11.3f}  {heavy}")
+
+if __name__ == '__main__':
+    main()
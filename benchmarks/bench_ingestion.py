@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark da ingestão do StatisticsGenerator: caminho antigo (lista de dicts,
+conversões via astype(str) e cópias de débitos/créditos) contra o caminho
+tipado a partir da matriz de get_all_values.
+
+Uso: python benchmarks/bench_ingestion.py [--sizes 10000,100000,1000000]
+"""
+
+import os
+import sys
+import gc
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from benchmarks.synthetic import HEADERS, synthetic_rows
+from src.statistics import StatisticsGenerator
+
+def legacy_ingestion(records):
+    """Reprodução da ingestão original, só para comparação"""
+    df = pd.DataFrame(records)
+    df['Data e Hora'] = pd.to_datetime(df['Data e Hora'], format='%d/%m/%Y %H:%M:%S')
+    df['Valor (R$)'] = df['Valor (R$)'].astype(str).str.replace(',', '.')
+    df['Valor (R$)'] = pd.to_numeric(df['Valor (R$)'], errors='coerce').fillna(0)
+    df['Créditos'] = df['Créditos'].astype(str).str.replace(',', '.')
+    df['Créditos'] = pd.to_numeric(df['Créditos'], errors='coerce').fillna(0)
+    df['Data'] = df['Data e Hora'].dt.date
+    debitos = df[df['Valor (R$)'] > 0].copy()
+    creditos = df[df['Créditos'] > 0].copy()
+    return df, debitos, creditos
+
+def typed_ingestion(values):
+    stats_gen = StatisticsGenerator.from_values(values)
+    return (stats_gen.df,)
+
+def measure(fn, arg):
+    # Tempo e memória em execuções separadas: o tracemalloc distorce o tempo
+    gc.collect()
+    started = time.perf_counter()
+    frames = fn(arg)
+    elapsed = time.perf_counter() - started
+    resident = sum(frame.memory_usage(deep=True).sum() for frame in frames)
+    del frames
+
+    gc.collect()
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, resident
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    args = parser.parse_args()
+
+    print(f"{'linhas':>9} {'caminho':<8} {'tempo (s)':>10} {'pico (MB)':>10} {'frames (MB)':>12}")
+    for size in [int(n) for n in args.sizes.split(',')]:
+        rows = synthetic_rows(size)
+        values = [HEADERS] + rows
+        records = [dict(zip(HEADERS, row)) for row in rows]
+
+        for name, fn, arg in (('antigo', legacy_ingestion, records), ('tipado', typed_ingestion, values)):
+            elapsed, peak, resident = measure(fn, arg)
+            print(f"{size:>9} {name:<8} {elapsed:>10.3f} {peak / 2**20:>10.1f} {resident / 2**20:>12.1f}")
+
+        del rows, values, records
+
+if __name__ == '__main__':
+    main()
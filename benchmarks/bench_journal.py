@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark do diário local (write-ahead journal): latência de cada append com
+fsync, com uma thread e com várias ao mesmo tempo (os appends simultâneos
+dividem o mesmo fsync), e o custo do ack com compactação.
+
+Uso: python benchmarks/bench_journal.py [--appends 2000] [--threads 1 4 16] [--dir /caminho]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.journal import WriteAheadJournal
+
+ROW = ['16/10/2026 12:00:00', 42.5, 'pix', 'mercado', 'compras da semana', 'maria', '']
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def run_appends(journal, appends, threads):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = appends // threads
+
+    def worker(offset):
+        local = []
+        for i in range(per_thread):
+            started = time.perf_counter()
+            journal.append([ROW], f"u:{offset + i}")
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--appends', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--dir', help='diretório do diário (use o mesmo disco do JOURNAL_PATH)')
+    args = parser.parse_args()
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+
+    print(f"{'threads':>7} {'appends/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'média (ms)':>11}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for threads in args.threads:
+            journal = WriteAheadJournal(os.path.join(directory, f'journal-{threads}.jsonl'))
+            latencies, elapsed = run_appends(journal, args.appends, threads)
+            print(
+                f"{threads:>7} {len(latencies) / elapsed:>10.0f} {percentile(latencies, 0.5) * 1000:>9.2f} "
+                f"{percentile(latencies, 0.99) * 1000:>9.2f} {statistics.mean(latencies) * 1000:>11.2f}"
+            )
+
+            # Um ack por lote de 20, como o WriteBuffer faz; compacta a cada 500 acks
+            started = time.perf_counter()
+            seqs = [seq for seq, _ in journal.pending()]
+            for i in range(19, len(seqs), 20):
+                journal.ack(seqs[i])
+            acks = len(seqs) // 20
+            if acks:
+                print(f"{'':>7} ack: {(time.perf_counter() - started) / acks * 1000:.2f} ms por lote, {journal.stats()['pending']} pendentes")
+            journal.close()
+
+if __name__ == '__main__':
+    main()
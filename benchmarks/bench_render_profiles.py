@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos perfis de renderização: tempo e tamanho de cada gráfico por perfil
+
+Uso: python benchmarks/bench_render_profiles.py [--rows 5000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_records
+from src.statistics import StatisticsGenerator, RENDER_PROFILES, CHART_PLOTTERS, render_chart
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    stats_gen = StatisticsGenerator(synthetic_records(args.rows))
+    # Renderização de aquecimento (fontes, caches internos do matplotlib)
+    render_chart('credito_vs_debito', stats_gen.chart_data('credito_vs_debito'))
+
+    print(f"{'perfil':<9} {'gráfico':<24} {'ms':>8} {'KB':>9}")
+    for profile in RENDER_PROFILES.values():
+        total_ms = 0.0
+        total_kb = 0.0
+        for chart_key in CHART_PLOTTERS:
+            data = stats_gen.chart_data(chart_key)
+            if data is None:
+                continue
+
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                image = render_chart(chart_key, data, profile)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            ms = min(timings)
+            kb = len(image) / 1024
+            total_ms += ms
+            total_kb += kb
+            print(f"{profile.name:<9} {chart_key:<24} {ms:>8.1f} {kb:>9.1f}")
+        print(f"{profile.name:<9} {'TOTAL':<24} {total_ms:>8.1f} {total_kb:>9.1f}\n")
+
+if __name__ == '__main__':
+    main()
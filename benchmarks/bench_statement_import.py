@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark da importação de extratos: gera arquivos CSV e OFX sintéticos e
+mede a vazão (linhas/s) e o pico de memória da leitura em fatias até as
+linhas prontas para o add_rows, sem acessar a planilha.
+
+Uso: python benchmarks/bench_statement_import.py [--lines 100000] [--chunk 500]
+"""
+
+import os
+import sys
+import gc
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import statement_import
+from src.storage import StorageBackend, _done_future
+
+DEFAULTS = {'usuario': 'bench', 'meio_pagamento': 'extrato', 'categoria': 'importado'}
+
+class CountingBackend(StorageBackend):
+    """Backend que só conta as linhas recebidas"""
+
+    def __init__(self):
+        super().__init__()
+        self.rows = 0
+        self.calls = 0
+
+    def add_rows(self, rows, entry_id=None):
+        self.rows += len(rows)
+        self.calls += 1
+        return _done_future(True)
+
+def write_csv(path, lines, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Data;Histórico;Valor\n')
+        for i in range(lines):
+            valor = rng.uniform(1, 800) * (1 if rng.random() < 0.1 else -1)
+            data = (start + timedelta(minutes=17 * i)).strftime('%d/%m/%Y')
+            f.write(f'{data};COMPRA CARTAO {i};{valor:.2f}'.replace('.', ',') + '\n')
+
+def write_ofx(path, lines, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n')
+        for i in range(lines):
+            valor = rng.uniform(1, 800) * (1 if rng.random() < 0.1 else -1)
+            data = (start + timedelta(minutes=17 * i)).strftime('%Y%m%d%H%M%S')
+            f.write(
+                f'<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>{data}[-3:BRT]\n'
+                f'<TRNAMT>{valor:.2f}\n<FITID>{i}\n<MEMO>COMPRA CARTAO {i}\n</STMTTRN>\n'
+            )
+        f.write('</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n')
+
+def run_import(path, kind, chunk_size):
+    backend = CountingBackend()
+    with statement_import.open_statement(path) as lines:
+        transactions = statement_import.iter_statement(lines, kind, DEFAULTS)
+        done = False
+        while not done:
+            chunk, _, done = statement_import.next_chunk(transactions, chunk_size)
+            if chunk:
+                backend.add_transactions(chunk)
+    return backend
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--chunk', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'formato':<8} {'arquivo (MB)':>12} {'tempo (s)':>10} {'linhas/s':>10} {'pico (MB)':>10} {'add_rows':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, writer in (('csv', write_csv), ('ofx', write_ofx)):
+            path = os.path.join(directory, f'extrato.{kind}')
+            writer(path, args.lines)
+
+            gc.collect()
+            started = time.perf_counter()
+            backend = run_import(path, kind, args.chunk)
+            elapsed = time.perf_counter() - started
+
+            gc.collect()
+            tracemalloc.start()
+            run_import(path, kind, args.chunk)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            size = os.path.getsize(path) / 2**20
+            print(
+                f"{kind:<8} {size:>12.1f} {elapsed:>10.2f} {backend.rows / elapsed:>10.0f} "
+                f"{peak / 2**20:>10.1f} {backend.calls:>9}"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do webhook: servidor antigo (Flask + event loop em thread com
+run_coroutine_threadsafe) contra o servidor aiohttp em um único event loop.
+Cada servidor roda em um subprocesso com a API do Telegram simulada e um
+handler que responde a mensagem; o cliente mede a latência de cada POST e o
+tempo até todas as updates serem processadas.
+
+Uso: python benchmarks/bench_webhook.py [--updates 2000] [--concurrency 50] [--api-latency 0.02]
+     [--chats 100] [--workers 32] [--max-queue 512]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import importlib.util
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from telegram.ext import Application, MessageHandler, filters
+from benchmarks.fake_telegram import FakeTelegramRequest, update_payload
+
+processed = 0
+
+async def echo(update, context):
+    global processed
+    await update.message.reply_text("📝 Despesa registrada!")
+    processed += 1
+
+def build_telegram_app(api_latency):
+    application = (
+        Application.builder()
+        .token('1:bench')
+        .request(FakeTelegramRequest(api_latency))
+        .get_updates_request(FakeTelegramRequest())
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.TEXT, echo))
+    return application
+
+def serve_legacy(port, api_latency):
+    """Reprodução do webhook_server.py original, só para comparação"""
+    import threading
+    from flask import Flask, request, jsonify
+    from telegram import Update
+    from werkzeug.serving import make_server
+
+    telegram_app = build_telegram_app(api_latency)
+    loop = asyncio.new_event_loop()
+
+    def run_loop():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(telegram_app.initialize())
+        loop.run_until_complete(telegram_app.start())
+        loop.run_forever()
+
+    threading.Thread(target=run_loop, daemon=True).start()
+    time.sleep(2)
+
+    app = Flask(__name__)
+
+    @app.route('/health')
+    def health():
+        return jsonify({'processed': processed})
+
+    @app.route('/webhook', methods=['POST'])
+    def webhook():
+        update = Update.de_json(request.get_json(), telegram_app.bot)
+        asyncio.run_coroutine_threadsafe(telegram_app.process_update(update), loop)
+        return jsonify({'status': 'ok'})
+
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+def serve_async(port, api_latency, workers, max_queue):
+    from aiohttp import web
+    from src.webhook import create_web_app
+
+    telegram_app = build_telegram_app(api_latency)
+    web_app = create_web_app(
+        telegram_app, health_info=lambda: {'processed': processed},
+        workers=workers, max_queue=max_queue
+    )
+    web.run_app(web_app, host='127.0.0.1', port=port, print=None)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+async def load(server, port, updates, concurrency, chats):
+    base = f'http://127.0.0.1:{port}'
+    latencies = []
+    rejected = 0
+    counter = iter(range(1, updates + 1))
+
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f'{base}/health') as response:
+                    await response.read()
+                break
+            except aiohttp.ClientError:
+                if server.poll() is not None:
+                    raise RuntimeError(f"o servidor terminou com código {server.returncode} antes de responder")
+                await asyncio.sleep(0.1)
+        else:
+            raise RuntimeError(f"o servidor não respondeu em {base}")
+
+        async def worker():
+            nonlocal rejected
+            for update_id in counter:
+                payload = update_payload(update_id, f'{update_id} - pix - bench (carga) - ana', update_id % chats + 1)
+                while True:
+                    started = time.perf_counter()
+                    async with session.post(f'{base}/webhook', json=payload) as response:
+                        await response.read()
+                    latencies.append(time.perf_counter() - started)
+                    if response.status != 503:
+                        break
+                    # Fila cheia: reenvia depois, como o Telegram faz
+                    rejected += 1
+                    await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        acked = time.perf_counter() - started
+
+        while True:
+            async with session.get(f'{base}/health') as response:
+                if (await response.json())['processed'] >= updates:
+                    break
+            await asyncio.sleep(0.01)
+        finished = time.perf_counter() - started
+
+    return acked, finished, latencies, rejected
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--chats', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--max-queue', type=int, default=512)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--serve', choices=['antigo', 'aiohttp'])
+    args = parser.parse_args()
+
+    if args.serve == 'antigo':
+        return serve_legacy(args.port, args.api_latency)
+    if args.serve == 'aiohttp':
+        return serve_async(args.port, args.api_latency, args.workers, args.max_queue)
+
+    servers = ('antigo', 'aiohttp')
+    if importlib.util.find_spec('flask') is None:
+        # O Flask saiu do requirements.txt; o servidor antigo só existe aqui para comparação
+        print("Flask não instalado: servidor antigo ignorado (pip install flask para comparar)")
+        servers = ('aiohttp',)
+    print(
+        f"{args.updates} updates de {args.chats} chats, {args.concurrency} conexões, "
+        f"API simulada com {args.api_latency * 1000:.0f} ms, {args.workers} workers, fila de {args.max_queue}"
+    )
+    print(f"{'servidor':<9} {'updates/s':>10} {'processadas/s':>14} {'p50 (ms)':>9} {'p99 (ms)':>9} {'503':>6}")
+    for name in servers:
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', name,
+             '--port', str(args.port), '--api-latency', str(args.api_latency),
+             '--workers', str(args.workers), '--max-queue', str(args.max_queue)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            acked, finished, latencies, rejected = asyncio.run(
+                load(server, args.port, args.updates, args.concurrency, args.chats)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{name:<9} {args.updates / acked:>10.0f} {args.updates / finished:>14.0f} "
+            f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} {rejected:>6}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Google Sheets simulado para os benchmarks: cliente, planilha e aba do gspread
+em memória, com latência por requisição e erros de cota (429) configuráveis,
+sem acessar a rede.
+"""
+
+import re
+import time
+import random
+import threading
+from collections import Counter
+from gspread.exceptions import APIError, WorksheetNotFound
+from src import sheets_client
+
+class QuotaResponse:
+    """Resposta HTTP 429 no formato que o gspread lê para montar o APIError"""
+    status_code = 429
+    text = 'Quota exceeded'
+
+    def json(self):
+        return {'error': {'code': 429, 'message': self.text, 'status': 'RESOURCE_EXHAUSTED'}}
+
+class FakeAPI:
+    """Latência e erros de cota de todas as abas de um FakeClient"""
+
+    def __init__(self, latency=0.0, quota_error_rate=0.0, seed=42):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.calls = Counter()
+        self.quota_errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def request(self, method):
+        with self._lock:
+            self.calls[method] += 1
+            quota_error = self.quota_error_rate and self._rng.random() < self.quota_error_rate
+            if quota_error:
+                self.quota_errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if quota_error:
+            raise APIError(QuotaResponse())
+
+    def stats(self):
+        with self._lock:
+            return {'calls': dict(self.calls), 'quota_errors': self.quota_errors}
+
+_RANGE = re.compile(r'^[A-Z]+(\d+):[A-Z]+(\d*)$')
+
+class FakeWorksheet:
+    def __init__(self, api, title, rows=None, sheet_id=0):
+        self.api = api
+        self.title = title
+        self.id = sheet_id
+        # Linhas como a API devolve (listas de strings); a lista é usada sem cópia
+        self.rows = rows if rows is not None else []
+        self._lock = threading.Lock()
+
+    def row_values(self, row):
+        self.api.request('row_values')
+        with self._lock:
+            return list(self.rows[row - 1]) if len(self.rows) >= row else []
+
+    def col_values(self, col):
+        self.api.request('col_values')
+        with self._lock:
+            return [row[col - 1] if len(row) >= col else '' for row in self.rows]
+
+    def get_all_values(self, **kwargs):
+        self.api.request('get_all_values')
+        with self._lock:
+            return [list(row) for row in self.rows]
+
+    def get_values(self, range_name, **kwargs):
+        self.api.request('get_values')
+        first, last = _RANGE.match(range_name).groups()
+        with self._lock:
+            return [list(row) for row in self.rows[int(first) - 1:int(last) if last else None]]
+
+    def append_row(self, values, **kwargs):
+        self.api.request('append_row')
+        with self._lock:
+            self.rows.append([str(value) for value in values])
+
+    def append_rows(self, values, **kwargs):
+        self.api.request('append_rows')
+        with self._lock:
+            self.rows.extend([str(value) for value in row] for row in values)
+
+    def update_cell(self, row, col, value):
+        self.api.request('update_cell')
+        with self._lock:
+            cells = self.rows[row - 1]
+            cells.extend([''] * (col - len(cells)))
+            cells[col - 1] = str(value)
+
+    def row_count(self):
+        with self._lock:
+            return len(self.rows)
+
+class FakeSpreadsheet:
+    def __init__(self, api):
+        self.api = api
+        self.worksheets = {}
+
+    def worksheet(self, title):
+        self.api.request('worksheet')
+        if title not in self.worksheets:
+            raise WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self.api.request('add_worksheet')
+        worksheet = self.worksheets[title] = FakeWorksheet(self.api, title, sheet_id=len(self.worksheets))
+        return worksheet
+
+    def batch_update(self, body):
+        # Só o que o clear_table usa: apagar os valores abaixo do cabeçalho
+        self.api.request('batch_update')
+        for request in body['requests']:
+            if 'updateCells' in request:
+                sheet_id = request['updateCells']['range']['sheetId']
+                for worksheet in self.worksheets.values():
+                    if worksheet.id == sheet_id:
+                        with worksheet._lock:
+                            del worksheet.rows[1:]
+
+class FakeClient:
+    def __init__(self, latency=0.0, quota_error_rate=0.0, seed=42):
+        self.api = FakeAPI(latency, quota_error_rate, seed)
+        self.spreadsheets = {}
+
+    def open_by_key(self, key):
+        self.api.request('open_by_key')
+        return self.spreadsheets.setdefault(key, FakeSpreadsheet(self.api))
+
+    def add_ledger(self, key, title, rows):
+        """Cria a aba já preenchida (cabeçalho + linhas), sem contar como requisição"""
+        spreadsheet = self.spreadsheets.setdefault(key, FakeSpreadsheet(self.api))
+        worksheet = FakeWorksheet(self.api, title, rows, sheet_id=len(spreadsheet.worksheets))
+        spreadsheet.worksheets[title] = worksheet
+        return worksheet
+
+def install(client):
+    """Todas as planilhas abertas pelo bot passam a usar o client simulado"""
+    sheets_client.shared_client = lambda credentials_path: client
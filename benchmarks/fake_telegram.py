@@ -0,0 +1,60 @@
+"""
+API do Telegram simulada para os benchmarks: responde getMe, sendMessage e
+afins localmente, com uma latência configurável, sem acessar a rede.
+"""
+
+import json
+import time
+import asyncio
+import itertools
+from telegram.request import BaseRequest
+
+class FakeTelegramRequest(BaseRequest):
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @property
+    def read_timeout(self):
+        return 5
+
+    def _message(self, **fields):
+        chat = {'id': 1, 'type': 'private'}
+        return dict({'message_id': next(self._ids), 'date': int(time.time()), 'chat': chat}, **fields)
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        endpoint = url.rsplit('/', 1)[-1]
+        self.calls.append(endpoint)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if endpoint == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'}
+        elif endpoint in ('sendPhoto', 'sendDocument'):
+            photo = [{'file_id': f'F{next(self._ids)}', 'file_unique_id': 'u', 'width': 1, 'height': 1}]
+            result = self._message(photo=photo)
+        elif endpoint in ('setWebhook', 'deleteWebhook'):
+            result = True
+        else:
+            result = self._message(text='ok')
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+def update_payload(update_id, text, chat_id=1):
+    """JSON de uma update de mensagem de texto, como o Telegram envia ao webhook"""
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Bench'},
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'update_id': update_id, 'message': message}
@@ -0,0 +1,35 @@
+"""
+Gera livros-caixa sintéticos no mesmo formato da planilha para os benchmarks
+"""
+
+import random
+from datetime import datetime, timedelta
+
+HEADERS = [
+    'Data e Hora', 'Valor (R$)', 'Meio de Pagamento',
+    'Categoria', 'Descrição', 'Usuário', 'Créditos'
+]
+
+USUARIOS = ['maria', 'joao', 'ana', 'pedro']
+CATEGORIAS = ['alimentacao', 'transporte', 'lazer', 'casa', 'saude', 'educacao']
+MEIOS = ['pix', 'dinheiro', 'cartaovisa', 'cartaomaster', 'debito']
+
+def synthetic_rows(n, seed=42, start=datetime(2023, 1, 1)):
+    """Lista de linhas (sem cabeçalho) em ordem cronológica, ~10% créditos"""
+    rng = random.Random(seed)
+    step = timedelta(days=730) / max(n, 1)
+    rows = []
+    for i in range(n):
+        data_hora = (start + step * i).strftime('%d/%m/%Y %H:%M:%S')
+        if rng.random() < 0.1:
+            rows.append([data_hora, '', '', '', '', '', f'{rng.uniform(500, 5000):.2f}'])
+        else:
+            rows.append([
+                data_hora, f'{rng.uniform(1, 800):.2f}', rng.choice(MEIOS),
+                rng.choice(CATEGORIAS), 'compra', rng.choice(USUARIOS), ''
+            ])
+    return rows
+
+def synthetic_records(n, seed=42):
+    """Mesmas linhas no formato de get_all_data (lista de dicts)"""
+    return [dict(zip(HEADERS, row)) for row in synthetic_rows(n, seed)]
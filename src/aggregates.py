@@ -0,0 +1,129 @@
+import threading
+from collections import defaultdict
+from .storage import HEADERS, sortable_date
+
+def format_summary(total_creditos, num_creditos, total_debitos, num_debitos, total_transacoes,
+                   data_inicio, data_fim, maior_gastador, valor_maior_gastador, categoria_freq):
+    saldo = total_creditos - total_debitos
+
+    return f"""📊 **RESUMO FINANCEIRO**
+
+💰 **Total de créditos**: R$ {total_creditos:.2f} ({num_creditos} transações)
+💸 **Total de débitos**: R$ {total_debitos:.2f} ({num_debitos} transações)
+💳 **Saldo atual**: R$ {saldo:.2f}
+📊 **Total de transações**: {total_transacoes}
+📅 **Período**: {data_inicio} a {data_fim}
+
+👤 **Maior gastador**: {maior_gastador} (R$ {valor_maior_gastador:.2f})
+🏷️ **Categoria mais frequente**: {categoria_freq}
+"""
+
+def _parse_amount(value):
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        return 0.0
+
+def _first_max(values):
+    # Em empate vence a menor chave, como idxmax/mode do pandas sobre grupos ordenados
+    return max(sorted(values.items()), key=lambda item: item[1])
+
+class AggregateStore:
+    """
+    Agregados do livro-caixa mantidos de forma incremental a cada escrita
+    confirmada. Responde o resumo do /statistics em O(1), sem montar um
+    DataFrame. Fica registrado como listener do backend de armazenamento.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.total_transacoes = 0
+        self.total_creditos = 0.0
+        self.num_creditos = 0
+        self.total_debitos = 0.0
+        self.num_debitos = 0
+        self.data_min = None
+        self.data_max = None
+
+        self.debitos_por_usuario = defaultdict(float)
+        self.debitos_por_categoria = defaultdict(float)
+        self.compras_por_categoria = defaultdict(int)
+        self.debitos_por_meio = defaultdict(float)
+        self.compras_por_meio = defaultdict(int)
+        self.debitos_por_dia = defaultdict(float)
+        self.debitos_por_mes = defaultdict(float)
+
+    def _add_row(self, row):
+        row = list(row) + [''] * (len(HEADERS) - len(row))
+        data_hora, valor, meio_pagamento, categoria, _, usuario, creditos = row[:len(HEADERS)]
+        valor = _parse_amount(valor)
+        creditos = _parse_amount(creditos)
+
+        self.total_transacoes += 1
+        self.total_debitos += valor
+        self.total_creditos += creditos
+        if creditos > 0:
+            self.num_creditos += 1
+
+        data = sortable_date(data_hora)
+        if data:
+            self.data_min = data if self.data_min is None else min(self.data_min, data)
+            self.data_max = data if self.data_max is None else max(self.data_max, data)
+
+        if valor > 0:
+            self.num_debitos += 1
+            self.debitos_por_usuario[usuario] += valor
+            self.debitos_por_categoria[categoria] += valor
+            self.compras_por_categoria[categoria] += 1
+            self.debitos_por_meio[meio_pagamento] += valor
+            self.compras_por_meio[meio_pagamento] += 1
+            if data:
+                self.debitos_por_dia[data[:10]] += valor
+                self.debitos_por_mes[data[:7]] += valor
+
+    def load(self, rows):
+        """Reconstrói os agregados a partir do histórico completo (linhas sem cabeçalho)"""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add_row(row)
+            self.loaded = True
+
+    def add_rows(self, rows):
+        """Listener do backend: linhas gravadas com sucesso"""
+        with self._lock:
+            if not self.loaded:
+                return
+            for row in rows:
+                self._add_row(row)
+
+    def reset(self):
+        """Listener do backend: tabela limpa"""
+        with self._lock:
+            self._reset()
+            self.loaded = True
+
+    def summary_text(self):
+        with self._lock:
+            if self.total_transacoes == 0:
+                return "Nenhum dado encontrado para gerar estatísticas."
+
+            if self.num_debitos:
+                maior_gastador, valor_maior_gastador = _first_max(self.debitos_por_usuario)
+                categoria_freq, _ = _first_max(self.compras_por_categoria)
+            else:
+                maior_gastador, valor_maior_gastador = "N/A", 0
+                categoria_freq = "N/A"
+
+            def dia(data):
+                return f"{data[8:10]}/{data[5:7]}/{data[0:4]}" if data else "N/A"
+
+            return format_summary(
+                self.total_creditos, self.num_creditos, self.total_debitos, self.num_debitos,
+                self.total_transacoes, dia(self.data_min), dia(self.data_max),
+                maior_gastador, valor_maior_gastador, categoria_freq
+            )
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class AsyncSheetsManager:
+    """
+    Fachada assíncrona sobre o GoogleSheetsManager: cada chamada ao gspread roda
+    em um pool de threads dedicado e limitado, então uma requisição lenta ao
+    Sheets nunca bloqueia o event loop do bot.
+    """
+
+    def __init__(self, manager, max_workers=4, max_queue=32):
+        self.manager = manager
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sheets-io')
+        # Limita chamadas submetidas ao pool; o excedente espera no event loop sem bloqueá-lo
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self.last_activity = time.monotonic()
+
+    async def _call(self, fn, *args):
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        enqueued_at = time.monotonic()
+        self.last_activity = enqueued_at
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+            if self._queued >= self.max_queue:
+                logger.warning(f"Fila do Sheets saturada: {self._queued} chamadas aguardando")
+
+        def run():
+            started_at = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+                self._total_wait += started_at - enqueued_at
+            failed = False
+            try:
+                return fn(*args)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+                    self._failed += failed
+                    self._total_run += time.monotonic() - started_at
+                    self.last_activity = time.monotonic()
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, run)
+        finally:
+            self._slots.release()
+
+    async def add_expense(self, valor, meio_pagamento, categoria, descricao, usuario, entry_id=None):
+        return await self._call(self.manager.add_expense, valor, meio_pagamento, categoria, descricao, usuario, entry_id)
+
+    async def add_credit(self, valor, entry_id=None):
+        return await self._call(self.manager.add_credit, valor, entry_id)
+
+    async def add_transactions(self, transactions, entry_id=None):
+        return await self._call(self.manager.add_transactions, transactions, entry_id)
+
+    async def clear_table(self, archive=False):
+        return await self._call(self.manager.clear_table, archive)
+
+    async def get_all_data(self):
+        return await self._call(self.manager.get_all_data)
+
+    async def get_all_values(self):
+        return await self._call(self.manager.get_all_values)
+
+    async def get_filtered_values(self, report_filter):
+        return await self._call(self.manager.get_filtered_values, report_filter)
+
+    def busy(self):
+        with self._lock:
+            return bool(self._waiting or self._queued or self._in_flight)
+
+    def metrics(self):
+        with self._lock:
+            completed = self._completed
+            started = completed + self._in_flight
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'waiting': self._waiting,
+                'queue_depth': self._queued,
+                'in_flight': self._in_flight,
+                'max_queue_depth': self._max_queue_depth,
+                'completed': completed,
+                'failed': self._failed,
+                'avg_wait_ms': round(self._total_wait / started * 1000, 2) if started else 0.0,
+                'avg_run_ms': round(self._total_run / completed * 1000, 2) if completed else 0.0,
+            }
+
+    def shutdown(self):
+        """Grava o que falta e encerra as threads; chamar fora do event loop (ex.: livro-caixa saindo do cache de tenants)"""
+        self.manager.close()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+
+class ChartCache:
+    """
+    Cache LRU das imagens renderizadas, endereçado pelo hash do agregado de cada
+    gráfico. Limitado em bytes e, opcionalmente, persistido em disco para
+    sobreviver a reinícios.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f'{digest}.img')
+
+    def get(self, digest):
+        with self._lock:
+            png = self._entries.get(digest)
+            if png is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return png
+
+        if self.directory and os.path.exists(self._path(digest)):
+            with open(self._path(digest), 'rb') as f:
+                png = f.read()
+            os.utime(self._path(digest))
+            self._store(digest, png)
+            with self._lock:
+                self.hits += 1
+            return png
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, digest, png):
+        self._store(digest, png)
+        if self.directory:
+            tmp_path = self._path(digest) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, self._path(digest))
+            self._prune_disk()
+
+    def _prune_disk(self):
+        # Mesmo limite de bytes no disco, removendo primeiro os arquivos usados há mais tempo
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.img'):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def _store(self, digest, png):
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[digest] = png
+            self._size += len(png)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+_chart_cache = None
+
+def get_chart_cache():
+    global _chart_cache
+    if _chart_cache is None:
+        _chart_cache = ChartCache(
+            max_bytes=int(float(os.getenv('CHART_CACHE_MAX_MB', '32')) * 1024 * 1024),
+            directory=os.getenv('CHART_CACHE_DIR') or None
+        )
+    return _chart_cache
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+class UpdateDeduplicator:
+    """
+    Lembra as updates já processadas (update_id e chat/message_id) por uma
+    janela de tempo, para que reenvios do Telegram não gravem a mesma despesa
+    duas vezes. Com path, as chaves vão para um JSONL e sobrevivem a reinícios;
+    o arquivo é reescrito só com a janela atual sempre que recebe mais
+    max_entries linhas, para não crescer sem limite.
+    """
+
+    def __init__(self, max_entries=10000, window=86400, path=None):
+        self.max_entries = max_entries
+        self.window = window
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        self._appended = 0
+        self.duplicates = 0
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        key, seen_at = json.loads(line)
+                        self._entries[key] = seen_at
+                        self._entries.move_to_end(key)
+            except Exception as e:
+                print(f"Aviso: não foi possível carregar o histórico de updates: {e}")
+            self._evict(time.time())
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._compact()
+
+    def _compact(self):
+        # Reescreve só as chaves ainda dentro da janela e segue anexando ao arquivo
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, seen_at in self._entries.items():
+                f.write(json.dumps([key, seen_at]) + '\n')
+        os.replace(tmp_path, self.path)
+        if self._file:
+            self._file.close()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._appended = 0
+
+    def _evict(self, now):
+        while self._entries:
+            key, seen_at = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - seen_at <= self.window:
+                break
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def keys_for(update):
+        keys = [f"u:{update.update_id}"]
+        message = update.effective_message
+        if message and update.effective_chat:
+            keys.append(f"m:{update.effective_chat.id}:{message.message_id}")
+        return keys
+
+    def is_duplicate(self, update):
+        """Registra a update e retorna True se ela (ou a mesma mensagem) já foi vista"""
+        keys = self.keys_for(update)
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if any(key in self._entries for key in keys):
+                self.duplicates += 1
+                return True
+            for key in keys:
+                self._entries[key] = now
+                if self._file:
+                    self._file.write(json.dumps([key, now]) + '\n')
+                    self._appended += 1
+            if self._file:
+                # A janela em memória já girou inteira: o resto do arquivo é lixo
+                if self._appended > self.max_entries:
+                    try:
+                        self._compact()
+                    except Exception as e:
+                        print(f"Aviso: não foi possível compactar o histórico de updates: {e}")
+                        self._appended = 0
+                        self._file.flush()
+                else:
+                    self._file.flush()
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'duplicates': self.duplicates}
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+_deduplicator = None
+
+def get_update_deduplicator():
+    global _deduplicator
+    if _deduplicator is None:
+        _deduplicator = UpdateDeduplicator(
+            max_entries=int(os.getenv('DEDUPE_MAX_ENTRIES', '10000')),
+            window=float(os.getenv('DEDUPE_WINDOW', '86400')),
+            path=os.getenv('DEDUPE_PATH') or None
+        )
+    return _deduplicator
@@ -0,0 +1,91 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+class FileIdCache:
+    """
+    Guarda o file_id que o Telegram devolve para cada gráfico enviado, indexado
+    pelo hash do conteúdo. Reenvios do mesmo gráfico usam o file_id e não sobem
+    o PNG de novo. Com path, as alterações vão para o arquivo numa thread,
+    até save_delay segundos depois: os gráficos de um relatório viram uma só
+    gravação, fora do event loop.
+    """
+
+    def __init__(self, max_entries=512, path=None, save_delay=1.0):
+        self.max_entries = max_entries
+        self.path = path
+        self.save_delay = save_delay
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._timer = None
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._entries.update(json.load(f))
+        except Exception as e:
+            print(f"Aviso: não foi possível carregar o cache de file_ids: {e}")
+
+    def _schedule_save(self):
+        # Chamar com _lock
+        if not self.path or self._timer is not None:
+            return
+        self._timer = threading.Timer(self.save_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Grava no arquivo as alterações ainda pendentes"""
+        with self._save_lock:
+            with self._lock:
+                if self._timer is None:
+                    return
+                self._timer.cancel()
+                self._timer = None
+                entries = dict(self._entries)
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Aviso: não foi possível salvar o cache de file_ids: {e}")
+
+    def get(self, digest):
+        with self._lock:
+            file_id = self._entries.get(digest)
+            if file_id is not None:
+                self._entries.move_to_end(digest)
+            return file_id
+
+    def put(self, digest, file_id):
+        with self._lock:
+            self._entries[digest] = file_id
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._schedule_save()
+
+    def discard(self, digest):
+        with self._lock:
+            if self._entries.pop(digest, None) is not None:
+                self._schedule_save()
+
+_file_id_cache = None
+
+def get_file_id_cache():
+    global _file_id_cache
+    if _file_id_cache is None:
+        _file_id_cache = FileIdCache(
+            max_entries=int(os.getenv('FILE_ID_CACHE_SIZE', '512')),
+            path=os.getenv('FILE_ID_CACHE_PATH') or None
+        )
+    return _file_id_cache
@@ -1,86 +1,487 @@
 import os
-import gspread
-from google.oauth2.service_account import Credentials
+import time
+import atexit
+import threading
 from datetime import datetime
-import pytz
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import numericise_all
+from .storage import StorageBackend, HEADERS, sortable_date, _done_future
+from .journal import WriteAheadJournal
+from .metrics import count_error
+from . import sheets_client
+from .sheets_scheduler import get_sheets_scheduler, READ, WRITE
+from .report_filters import sortable_range, row_matches
 
-class GoogleSheetsManager:
-    def __init__(self):
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
+def _date_keys(rows):
+    return [sortable_date(row[0] if row else '') or '' for row in rows]
 
-        credentials_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE")
-        credentials = Credentials.from_service_account_file(credentials_path, scopes=scope)
-        self.client = gspread.authorize(credentials)
+def _is_sorted(keys):
+    return all(a <= b for a, b in zip(keys, keys[1:]))
 
-        self.sheet_id = os.getenv('GOOGLE_SHEET_ID')
-        self.sheet_name = os.getenv('GOOGLE_SHEET_NAME')
-        self.spreadsheet = self.client.open_by_key(self.sheet_id)
-        self.worksheet = self.spreadsheet.worksheet(self.sheet_name)
+class WriteBuffer:
+    """
+    Buffer write-behind: acumula linhas pendentes e envia todas juntas em uma
+    única chamada append_rows quando atinge max_size linhas ou quando a linha
+    mais antiga completa max_age segundos. Com retry=True (linhas já guardadas
+    no diário local) um lote que falhou volta para o início da fila e é
+    reenviado com backoff exponencial, em vez de falhar.
+    """
 
-        self.tz = pytz.timezone('America/Sao_Paulo')
-        self._initialize_headers()
+    def __init__(self, flush_fn, max_size=20, max_age=2.0, on_flushed=None, retry=False, max_backoff=300.0):
+        self._flush_fn = flush_fn
+        self.max_size = max_size
+        self.max_age = max_age
+        # Recebe as tags (seq do diário) de cada lote gravado
+        self._on_flushed = on_flushed
+        self.retry = retry
+        self.max_backoff = max_backoff
+        self._backoff = 0.0
+        self._retry_at = None
 
-    def _initialize_headers(self):
-        try:
-            headers = self.worksheet.row_values(1)
-            if not headers:
-                self.worksheet.append_row([
-                    'Data e Hora', 'Valor (R$)', 'Meio de Pagamento', 
-                    'Categoria', 'Descrição', 'Usuário', 'Créditos'
-                ])
-            elif len(headers) < 7:
+        self._pending = []
+        self._pending_rows = 0
+        self._oldest = None
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, name='sheets-write-buffer', daemon=True)
+        self._thread.start()
+
+    def add(self, rows, tag=None):
+        """Enfileira as linhas e retorna um Future que recebe True/False após o flush"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Buffer de escrita já foi fechado")
+            was_empty = not self._pending
+            self._pending.append((rows, future, tag))
+            self._pending_rows += len(rows)
+            if was_empty:
+                self._oldest = time.monotonic()
+            full = self._pending_rows >= self.max_size
+
+        if was_empty or full:
+            self._wakeup.set()
+        return future
+
+    def _is_due(self):
+        with self._lock:
+            if not self._pending:
+                return False
+            if self._retry_at is not None and time.monotonic() < self._retry_at:
+                return False
+            return (self._pending_rows >= self.max_size
+                    or time.monotonic() - self._oldest >= self.max_age)
+
+    def _run(self):
+        while not self._closed:
+            with self._lock:
+                due = self._oldest + self.max_age if self._pending else None
+                if due is not None and self._retry_at is not None:
+                    due = max(due, self._retry_at)
+            timeout = None if due is None else max(0, due - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._is_due():
+                self.flush()
+
+    def flush(self):
+        # O flush_lock garante que os lotes cheguem à planilha na ordem em que foram enfileirados
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = []
+                self._pending_rows = 0
+                self._oldest = None
+
+            if not batch:
+                return
+
+            rows = [row for batch_rows, _, _ in batch for row in batch_rows]
+            try:
+                self._flush_fn(rows)
+                success = True
+            except Exception as e:
+                print(f"Erro ao gravar lote de {len(rows)} linha(s): {e}")
+                count_error('write_buffer', e)
+                success = False
+                if self.retry:
+                    self._requeue(batch, len(rows))
+                    return
+
+            tags = [tag for _, _, tag in batch if tag is not None]
+            if success and tags and self._on_flushed:
                 try:
-                    self.worksheet.update_cell(1, 7, 'Créditos')
+                    self._on_flushed(tags)
                 except Exception as e:
-                    print(f"Aviso: Não foi possível adicionar coluna de créditos automaticamente: {e}")
-                    print("Por favor, adicione manualmente a coluna 'Créditos' na planilha.")
-        except Exception as e:
-            print(f"Erro ao inicializar cabeçalhos: {e}")
+                    print(f"Erro ao confirmar lote no diário local: {e}")
+            with self._lock:
+                self._backoff = 0.0
+                self._retry_at = None
 
-    def _normalize_text(self, text):
-        return text.lower().replace(' ', '')
+            for _, future, _ in batch:
+                future.set_result(success)
 
-    def add_expense(self, valor, meio_pagamento, categoria, descricao, usuario):
-        try:
-            now = datetime.now(self.tz)
-            data_hora = now.strftime('%d/%m/%Y %H:%M:%S')
-            meio_pagamento = self._normalize_text(meio_pagamento)
-            categoria = self._normalize_text(categoria)
-            usuario = self._normalize_text(usuario)
-            row = [data_hora, valor, meio_pagamento, categoria, descricao, usuario, '']
-            self.worksheet.append_row(row)
-            return True
-        except Exception as e:
-            print(f"Erro ao adicionar despesa: {e}")
-            return False
+    def _requeue(self, batch, row_count):
+        # Chamar com _flush_lock: o lote volta na frente para manter a ordem
+        with self._lock:
+            self._pending = batch + self._pending
+            self._pending_rows += row_count
+            self._oldest = time.monotonic()
+            self._backoff = min(max(self._backoff * 2, self.max_age, 1.0), self.max_backoff)
+            self._retry_at = self._oldest + self._backoff
+            backoff = self._backoff
+        print(f"Lote mantido no diário local; nova tentativa em {backoff:.0f}s")
 
-    def add_credit(self, valor):
-        try:
-            now = datetime.now(self.tz)
-            data_hora = now.strftime('%d/%m/%Y %H:%M:%S')
-            row = [data_hora, '', '', '', '', '', valor]
-            self.worksheet.append_row(row)
-            return True
-        except Exception as e:
-            print(f"Erro ao adicionar crédito: {e}")
-            return False
+    def pending_rows(self):
+        with self._lock:
+            return self._pending_rows
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+class GoogleSheetsManager(StorageBackend):
+    name = 'sheets'
+
+    def __init__(self, sheet_id=None, sheet_name=None, create_worksheet=False, rate_limiter=None, journal_path=None):
+        super().__init__()
+        self.credentials_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE")
+        self.sheet_id = sheet_id or os.getenv('GOOGLE_SHEET_ID')
+        self.sheet_name = sheet_name or os.getenv('GOOGLE_SHEET_NAME')
+        self.create_worksheet = create_worksheet
+        # TokenBucket do tenant: cada requisição à API espera o seu token
+        self.rate_limiter = rate_limiter
+        self.scheduler = get_sheets_scheduler()
+        # Escritas confirmadas; uma leitura da cópia local só é reaproveitada se nada foi gravado depois dela
+        self._write_version = 0
+
+        # Conexão feita no primeiro uso: uma falha do Google não impede o bot de subir
+        self.client = None
+        self._spreadsheet = None
+        self._worksheet = None
+        self._headers_checked = False
+        self._connect_lock = threading.Lock()
+
+        # Cópia local das linhas da planilha (cabeçalho incluso), atualizada de forma incremental
+        self._snapshot = []
+        self._snapshot_keys = []
+        self._snapshot_sorted = False
+        self._snapshot_loaded_at = 0.0
+        self._snapshot_fetched_at = 0.0
+        self._snapshot_version = 0
+        self._snapshot_lock = threading.Lock()
+        self.snapshot_max_age = float(os.getenv('SHEETS_SNAPSHOT_MAX_AGE', '3600'))
+
+        # Diário local: as linhas sobrevivem a falhas do Sheets e a reinícios até serem confirmadas
+        self.journal = WriteAheadJournal(journal_path) if journal_path else None
+        self.journaled = self.journal is not None
+        # Diário e buffer recebem as linhas na mesma ordem: o ack de um lote
+        # (tudo até o maior seq) nunca cobre um seq que ainda não entrou no buffer
+        self._enqueue_lock = threading.Lock()
+        self.write_buffer = WriteBuffer(
+            self.append_rows,
+            max_size=int(os.getenv('SHEETS_BATCH_SIZE', '20')),
+            max_age=float(os.getenv('SHEETS_BATCH_MAX_AGE', '2')),
+            on_flushed=self._acknowledge if self.journal else None,
+            retry=self.journaled
+        )
+        atexit.register(self.close)
+
+        if self.journal:
+            replay = self.journal.pending()
+            if replay:
+                print(f"Reenviando {len(replay)} lote(s) do diário local para a planilha")
+            for seq, rows in replay:
+                self._enqueue(rows, seq)
+
+    def _connect(self):
+        with self._connect_lock:
+            if self._worksheet is not None:
+                return
+            # Cliente e pool HTTP são os mesmos para todas as planilhas do processo
+            client = sheets_client.shared_client(self.credentials_path)
+            spreadsheet = self._api(READ, client.open_by_key, self.sheet_id)
+            try:
+                worksheet = self._api(READ, spreadsheet.worksheet, self.sheet_name)
+            except WorksheetNotFound:
+                if not self.create_worksheet:
+                    raise
+                worksheet = self._api(WRITE, spreadsheet.add_worksheet, self.sheet_name, rows=1000, cols=len(HEADERS))
+
+            self.client, self._spreadsheet = client, spreadsheet
+            # A aba só fica disponível com o cabeçalho conferido: se falhar, o
+            # próximo acesso tenta de novo em vez de gravar a primeira despesa na linha 1
+            if not self._headers_checked:
+                try:
+                    self._initialize_headers(worksheet)
+                except Exception as e:
+                    print(f"Erro ao inicializar cabeçalhos: {e}")
+                    raise
+            self._worksheet = worksheet
+
+    def _api(self, kind, fn, *args, **kwargs):
+        """Toda requisição ao gspread passa pela cota do tenant e depois pelo SheetsScheduler"""
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+        return self.scheduler.call(kind, fn, *args, **kwargs)
+
+    def estimated_wait(self, kind):
+        wait = self.scheduler.estimated_wait(kind)
+        if self.rate_limiter:
+            wait = max(wait, self.rate_limiter.estimated_wait())
+        return wait
+
+    @property
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            self._connect()
+        return self._spreadsheet
+
+    @property
+    def worksheet(self):
+        if self._worksheet is None:
+            self._connect()
+        return self._worksheet
+
+    def _initialize_headers(self, worksheet):
+        headers = self._api(READ, worksheet.row_values, 1)
+        if not headers:
+            self._api(WRITE, worksheet.append_row, HEADERS)
+        elif len(headers) < 7:
+            try:
+                self._api(WRITE, worksheet.update_cell, 1, 7, 'Créditos')
+            except Exception as e:
+                print(f"Aviso: Não foi possível adicionar coluna de créditos automaticamente: {e}")
+                print("Por favor, adicione manualmente a coluna 'Créditos' na planilha.")
+        self._headers_checked = True
+
+    def append_rows(self, rows):
+        self._api(WRITE, self.worksheet.append_rows, rows)
+        self._write_version += 1
+
+    def add_rows(self, rows, entry_id=None):
+        if not self.journal:
+            return self._enqueue(rows)
+        # Sob o lock só a gravação no diário e o add no buffer; o fsync fica de
+        # fora para que escritores simultâneos dividam o mesmo (group commit)
+        with self._enqueue_lock:
+            try:
+                seq, record = self.journal.write(rows, entry_id)
+            except Exception as e:
+                print(f"Erro ao gravar no diário local, enviando só pelo buffer: {e}")
+                seq = record = None
+            else:
+                if seq is None:
+                    # Update repetida: as linhas já estão no diário ou na planilha
+                    return _done_future(True)
+            future = self._enqueue(rows, seq)
+        if record is not None:
+            try:
+                self.journal.sync(record)
+            except Exception as e:
+                print(f"Erro ao sincronizar o diário local, enviando só pelo buffer: {e}")
+        return future
+
+    def _enqueue(self, rows, seq=None):
+        future = self.write_buffer.add(rows, tag=seq)
+        future.add_done_callback(lambda f: f.result() and self._notify_rows(rows))
+        return future
+
+    def _acknowledge(self, seqs):
+        self.journal.ack(max(seqs))
+
+    def flush(self):
+        self.write_buffer.flush()
+
+    def status(self):
+        status = {'backend': self.name, 'pending_rows': self.write_buffer.pending_rows()}
+        if self.journal:
+            status['journal'] = self.journal.stats()
+        return status
+
+    def close(self):
+        self.write_buffer.close()
+        if self.journal:
+            pending = self.write_buffer.pending_rows()
+            if pending:
+                print(f"{pending} linha(s) ficam no diário local para a próxima execução")
+            self.journal.close()
+        atexit.unregister(self.close)
+
+    def _pad_row(self, row):
+        return (list(row) + [''] * len(HEADERS))[:len(HEADERS)]
+
+    def _reload_snapshot(self):
+        version = self._write_version
+        self._snapshot = [self._pad_row(row) for row in self._api(READ, self.worksheet.get_all_values)]
+        # Datas ordenáveis de cada linha: com a planilha em ordem cronológica o
+        # filtro de período vira busca binária
+        self._snapshot_keys = _date_keys(self._snapshot)
+        self._snapshot_sorted = _is_sorted(self._snapshot_keys[1:])
+        self._snapshot_loaded_at = time.monotonic()
+        self._snapshot_fetched_at = self._snapshot_loaded_at
+        self._snapshot_version = version
 
-    def clear_table(self):
+    def _snapshot_warm(self):
+        expired = time.monotonic() - self._snapshot_loaded_at > self.snapshot_max_age
+        return len(self._snapshot) > 1 and not expired
+
+    def _update_snapshot(self):
+        """
+        Busca só as linhas novas desde a última leitura (A{n}:G). A última linha
+        conhecida é relida junto: se ela mudou, linhas foram apagadas e a cópia
+        local é recarregada por completo. Chamar com _snapshot_lock.
+        """
+        if not self._snapshot_warm():
+            self._reload_snapshot()
+            return
+
+        last_row = len(self._snapshot)
+        version = self._write_version
+        fetched = [self._pad_row(row) for row in self._api(READ, self.worksheet.get_values, f'A{last_row}:G')]
+        if not fetched or fetched[0] != self._snapshot[-1]:
+            self._reload_snapshot()
+            return
+
+        new_keys = _date_keys(fetched[1:])
+        if new_keys:
+            self._snapshot_sorted = (
+                self._snapshot_sorted and self._snapshot_keys[-1] <= new_keys[0] and _is_sorted(new_keys)
+            )
+        self._snapshot.extend(fetched[1:])
+        self._snapshot_keys.extend(new_keys)
+        self._snapshot_fetched_at = time.monotonic()
+        self._snapshot_version = version
+
+    def _snapshot_shared(self, requested_at):
+        """
+        A leitura que terminou enquanto esta chamada esperava pelo lock serve
+        para ela também (duas /statistics juntas fazem uma requisição só),
+        desde que nenhuma escrita tenha sido confirmada depois
+        """
+        shared = (
+            self._snapshot_warm() and self._snapshot_fetched_at >= requested_at
+            and self._snapshot_version == self._write_version
+        )
+        if shared:
+            self.scheduler.record_coalesced()
+        return shared
+
+    def _refresh_snapshot(self):
+        requested_at = time.monotonic()
+        with self._snapshot_lock:
+            if not self._snapshot_shared(requested_at):
+                self._update_snapshot()
+            return list(self._snapshot)
+
+    def invalidate_snapshot(self):
+        with self._snapshot_lock:
+            self._snapshot = []
+            self._snapshot_keys = []
+            self._snapshot_sorted = False
+
+    def clear_table(self, archive=False):
+        """
+        Limpa a tabela com um único batch_update, sem baixar as linhas: apaga os
+        valores abaixo do cabeçalho e reduz a aba a 2 linhas. Com archive=True a
+        mesma requisição antes duplica a aba (cópia feita no servidor) em uma
+        aba datada.
+        """
         try:
-            all_values = self.worksheet.get_all_values()
-            if len(all_values) > 1:
-                self.worksheet.delete_rows(2, len(all_values))
+            self.flush()
+            sheet_id = self.worksheet.id
+            requests = []
+            if archive:
+                requests.append({'duplicateSheet': {
+                    'sourceSheetId': sheet_id,
+                    'newSheetName': f"{self.sheet_name} {datetime.now(self.tz):%Y-%m-%d %H-%M-%S}"
+                }})
+            requests.append({'updateCells': {
+                'range': {'sheetId': sheet_id, 'startRowIndex': 1},
+                'fields': 'userEnteredValue'
+            }})
+            # 2 linhas e não 1: a aba precisa de uma linha além do cabeçalho congelado
+            requests.append({'updateSheetProperties': {
+                'properties': {'sheetId': sheet_id, 'gridProperties': {'rowCount': 2}},
+                'fields': 'gridProperties.rowCount'
+            }})
+            self._api(WRITE, self.spreadsheet.batch_update, {'requests': requests})
+            self._write_version += 1
+            self.invalidate_snapshot()
+            self._notify_reset()
             return True
         except Exception as e:
             print(f"Erro ao limpar tabela: {e}")
             return False
 
+    def get_all_values(self):
+        self.flush()
+        return self._refresh_snapshot()
+
+    def get_filtered_values(self, report_filter):
+        """
+        Com a planilha em ordem cronológica, só as linhas do período saem da
+        cópia local (busca binária) ou, sem cópia local, da API: primeiro a
+        coluna de datas e depois apenas o intervalo A{i}:G{j}.
+        """
+        if report_filter.start is None:
+            return super().get_filtered_values(report_filter)
+
+        self.flush()
+        start, end = sortable_range(report_filter)
+        requested_at = time.monotonic()
+        with self._snapshot_lock:
+            if self._snapshot_warm():
+                if not self._snapshot_shared(requested_at):
+                    self._update_snapshot()
+                rows = self._snapshot_range(start, end)
+            else:
+                rows = self._fetch_range(start, end)
+
+        return [list(HEADERS)] + [row for row in rows if row_matches(row, report_filter)]
+
+    def _snapshot_range(self, start, end):
+        if not self._snapshot_sorted:
+            return [
+                row for row, key in zip(self._snapshot[1:], self._snapshot_keys[1:])
+                if start <= key <= end
+            ]
+        first = bisect_left(self._snapshot_keys, start, lo=1)
+        last = bisect_right(self._snapshot_keys, end, lo=1)
+        return self._snapshot[first:last]
+
+    def _fetch_range(self, start, end):
+        keys = _date_keys([[value] for value in self._api(READ, self.worksheet.col_values, 1)])
+        if not _is_sorted(keys[1:]):
+            # Fora de ordem não há intervalo contíguo: carrega a cópia local inteira
+            self._reload_snapshot()
+            return self._snapshot_range(start, end)
+
+        first = bisect_left(keys, start, lo=1)
+        last = bisect_right(keys, end, lo=1)
+        if first >= last:
+            return []
+        # Índice i da lista é a linha i + 1 da planilha
+        return [self._pad_row(row) for row in self._api(READ, self.worksheet.get_values, f'A{first + 1}:G{last}')]
+
     def get_all_data(self):
         try:
-            records = self.worksheet.get_all_records()
+            values = self.get_all_values()
+            if not values:
+                return []
+            keys = values[0]
+            records = [dict(zip(keys, numericise_all(row))) for row in values[1:]]
             return records
         except Exception as e:
             print(f"Erro ao obter dados: {e}")
@@ -0,0 +1,160 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+class WriteAheadJournal:
+    """
+    Diário local append-only (JSONL) das linhas ainda não confirmadas na
+    planilha. append() só retorna depois do fsync, e appends simultâneos
+    dividem o mesmo fsync (group commit). ack(seq) marca como gravado tudo até
+    seq; a cada compact_every confirmações o arquivo é reescrito só com o que
+    falta enviar. A chave de cada entrada (update do Telegram) é lembrada para
+    que um reenvio da mesma update não grave as linhas duas vezes.
+
+    Registros: {"seq": n, "key": ..., "rows": [...]}, {"ack": n} e {"seen": [...]}.
+    """
+
+    def __init__(self, path, compact_every=500, max_keys=10000, fsync=True):
+        self.path = path
+        self.compact_every = compact_every
+        self.max_keys = max_keys
+        self.fsync = fsync
+
+        self._pending = OrderedDict()  # seq -> (key, rows), na ordem de gravação
+        self._keys = OrderedDict()
+        self._seq = 0
+        self._records = 0
+        self._synced = 0
+        self._acks_since_compact = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+        # Reescreve só o pendente (descartando uma linha cortada no fim) e segue anexando
+        self.compact()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"Aviso: registro inválido ignorado no diário {self.path}")
+                    continue
+                if 'seq' in record:
+                    self._seq = max(self._seq, record['seq'])
+                    self._pending[record['seq']] = (record.get('key'), record['rows'])
+                    self._remember(record.get('key'))
+                elif 'ack' in record:
+                    while self._pending and next(iter(self._pending)) <= record['ack']:
+                        self._pending.popitem(last=False)
+                elif 'seen' in record:
+                    for key in record['seen']:
+                        self._remember(key)
+
+    def _remember(self, key):
+        if key is None:
+            return
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+    def _write(self, record):
+        # Chamar com _lock; retorna o número do registro para o _sync
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._records += 1
+        return self._records
+
+    def _sync(self, record):
+        with self._sync_lock:
+            # Outra thread já sincronizou este registro junto com o dela
+            if self._synced >= record:
+                return
+            with self._lock:
+                self._file.flush()
+                target = self._records
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._synced = target
+
+    def append(self, rows, key=None):
+        """Grava as linhas de forma durável e retorna o seq; None se a chave já foi vista"""
+        seq, record = self.write(rows, key)
+        if seq is not None:
+            self.sync(record)
+        return seq
+
+    def write(self, rows, key=None):
+        """
+        Como append(), mas sem esperar o fsync: retorna (seq, registro), ou
+        (None, None) se a chave já foi vista. Chamar sync(registro) antes de
+        considerar as linhas duráveis.
+        """
+        with self._lock:
+            if key is not None and key in self._keys:
+                return None, None
+            self._remember(key)
+            self._seq += 1
+            seq = self._seq
+            self._pending[seq] = (key, rows)
+            return seq, self._write({'seq': seq, 'key': key, 'rows': rows})
+
+    def sync(self, record):
+        """Espera o fsync (compartilhado) que cobre o registro"""
+        self._sync(record)
+
+    def ack(self, seq):
+        """Tudo até seq (inclusive) já está na planilha"""
+        with self._lock:
+            while self._pending and next(iter(self._pending)) <= seq:
+                self._pending.popitem(last=False)
+            record = self._write({'ack': seq})
+            self._acks_since_compact += 1
+            compact = self._acks_since_compact >= self.compact_every
+        if compact:
+            self.compact()
+        else:
+            self._sync(record)
+
+    def pending(self):
+        """(seq, linhas) ainda não confirmadas, na ordem em que foram gravadas"""
+        with self._lock:
+            return [(seq, rows) for seq, (_, rows) in self._pending.items()]
+
+    def compact(self):
+        with self._sync_lock, self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                if self._keys:
+                    f.write(json.dumps({'seen': list(self._keys)}, ensure_ascii=False) + '\n')
+                for seq, (key, rows) in self._pending.items():
+                    f.write(json.dumps({'seq': seq, 'key': key, 'rows': rows}, ensure_ascii=False) + '\n')
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            if self._file:
+                self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._synced = self._records
+            self._acks_since_compact = 0
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'last_seq': self._seq}
+
+    def close(self):
+        with self._sync_lock, self._lock:
+            if self._file and not self._file.closed:
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                self._file.close()
@@ -1,11 +1,33 @@
 import os
 import re
+import asyncio
 import logging
+import threading
+import importlib
+import tempfile
+import time
+from datetime import datetime
+import pytz
 from dotenv import load_dotenv
-from telegram import Update, InputFile
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram import Update, InputFile, InputMediaPhoto, InputMediaDocument
+from telegram.error import TelegramError
+from telegram.ext import (
+    Application, ApplicationHandlerStop, CommandHandler, MessageHandler, TypeHandler, filters, ContextTypes
+)
 from .google_sheets import GoogleSheetsManager
-from .statistics import StatisticsGenerator
+from .async_sheets import AsyncSheetsManager
+from .storage import create_storage
+from .aggregates import AggregateStore
+from .render_profiles import RENDER_PROFILES, get_render_profile
+from .file_id_cache import get_file_id_cache
+from .dedupe import get_update_deduplicator
+from .report_filters import parse_report_filter, describe_filter, FILTER_USAGE
+from .tenants import create_tenant_cache, default_route
+from . import sheets_client
+from . import statement_import
+from .metrics import (
+    PARSE_EXPENSE_SECONDS, STATISTICS_SECONDS, TELEGRAM_UPLOAD_SECONDS, count_error, timed, timed_handler
+)
 
 load_dotenv()
 
@@ -20,8 +42,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class FinanceBotManager:
-    def __init__(self):
-        self.sheets_manager = GoogleSheetsManager()
+    def __init__(self, route=None, rate_limiter=None):
+        # Sem rota: a planilha do GOOGLE_SHEET_ID/GOOGLE_SHEET_NAME
+        self.route = route = route or default_route()
+        # Com o SQLite as escritas já são duráveis e o diário local não é usado
+        sqlite = os.getenv('STORAGE_BACKEND', 'sheets').lower() == 'sqlite'
+        self.sheets_manager = GoogleSheetsManager(
+            route.sheet_id, route.sheet_name,
+            create_worksheet=route.create_worksheet, rate_limiter=rate_limiter,
+            journal_path=None if sqlite else route.journal_path
+        )
+        self.backend = create_storage(self.sheets_manager, route.db_path)
+        self.aggregates = AggregateStore()
+        self.backend.add_listener(self.aggregates)
+        self.sheets = AsyncSheetsManager(
+            self.backend,
+            max_workers=int(os.getenv('SHEETS_MAX_WORKERS', '4')),
+            max_queue=int(os.getenv('SHEETS_MAX_QUEUE', '32'))
+        )
         
         self.expense_pattern = re.compile(
             r'^(\d+(?:[.,]\d{1,2})?)\s*-\s*([^-]+?)\s*-\s*([^-()]+?)\s*\(([^)]+)\)\s*-\s*(.+?)$',
@@ -33,6 +71,7 @@ class FinanceBotManager:
             re.IGNORECASE
         )
     
+    @timed(PARSE_EXPENSE_SECONDS)
     def parse_expense(self, message_text):
         message_text = message_text.strip()
         
@@ -70,9 +109,92 @@ class FinanceBotManager:
             }
         
         return None
+    
+    def parse_batch(self, message_text):
+        """Uma transação por linha: lista de (número da linha, texto, dados ou None)"""
+        lines = [line.strip() for line in message_text.splitlines()]
+        return [
+            (number, line, self.parse_expense(line))
+            for number, line in enumerate(lines, start=1) if line
+        ]
+    
+    def close(self):
+        """Grava as linhas pendentes e libera o livro-caixa (fora do event loop)"""
+        self.sheets.shutdown()
+
+# Um FinanceBotManager por livro-caixa, criados sob demanda: importar este
+# módulo não abre nenhuma planilha
+_tenant_cache = None
+_tenant_cache_lock = threading.Lock()
+
+def get_tenant_cache():
+    global _tenant_cache
+    with _tenant_cache_lock:
+        if _tenant_cache is None:
+            _tenant_cache = create_tenant_cache(FinanceBotManager)
+        return _tenant_cache
+
+def get_bot_manager(chat_id=None):
+    """O FinanceBotManager do chat (sem chat_id, o da planilha padrão)"""
+    return get_tenant_cache().get(chat_id)
+
+def __getattr__(name):
+    # Compatibilidade com `from src.main import bot_manager`
+    if name == 'bot_manager':
+        return get_bot_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def bot_manager_ready():
+    return _tenant_cache is not None and _tenant_cache.is_built()
+
+async def _manager(chat_id=None):
+    """O FinanceBotManager do chat sem bloquear o event loop enquanto ele conecta à planilha"""
+    bot_manager = get_tenant_cache().cached(chat_id)
+    if bot_manager is not None:
+        return bot_manager
+    return await asyncio.to_thread(get_bot_manager, chat_id)
+
+async def _statistics_module():
+    # pandas/matplotlib/seaborn só são importados no primeiro /statistics (ou no warm-up)
+    return await asyncio.to_thread(importlib.import_module, '.statistics', __package__)
+
+def warm_up():
+    """Conecta à planilha e importa a pilha de gráficos em segundo plano"""
+    def run():
+        try:
+            get_bot_manager()
+            importlib.import_module('.statistics', __package__)
+            logger.info("Warm-up concluído")
+        except Exception as e:
+            logger.error(f"Erro no warm-up: {e}")
+    
+    threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+async def start_warm_up(application):
+    warm_up()
+
+MEDIA_GROUP_LIMIT = 10
+
+# Acima disso a resposta avisa que a requisição está na fila da cota do Google
+QUEUED_NOTICE_MIN_WAIT = 2
 
-bot_manager = FinanceBotManager()
+def _queued_notice(bot_manager, kind):
+    wait = bot_manager.backend.estimated_wait(kind)
+    if wait < QUEUED_NOTICE_MIN_WAIT:
+        return ""
+    return f"\n\n⏳ Na fila: a planilha atingiu o limite de requisições do Google. Previsão: cerca de {wait:.0f}s."
 
+CHART_NAMES = {
+    'gastos_por_pessoa': '👥 Gastos por Pessoa',
+    'meio_pagamento': '💳 Meios de Pagamento',
+    'compras_por_categoria': '🏷️ Compras por Categoria',
+    'total_gasto_mes': '📅 Total Gasto por Mês',
+    'gastos_por_dia': '📈 Gastos por Dia',
+    'credito_vs_debito': '⚖️ Créditos vs Débitos',
+    'debitos_acumulados': '📊 Débitos Acumulados'
+}
+
+@timed_handler('start')
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     welcome_message = """
 🤖 **Bot de Controle Financeiro Familiar**
@@ -87,6 +209,10 @@ Olá! Eu sou seu assistente financeiro pessoal.
 **Para créditos:**
 `valor - credito`
 
+**Vários de uma vez:** envie uma transação por linha na mesma mensagem
+
+**Extratos:** envie um arquivo CSV ou OFX (legenda opcional: `usuario=maria meio=nubank categoria=mercado`)
+
 **Exemplos:**
 • `100.50 - Cartão Visa - Alimentação (supermercado) - Maria`
 • `50.00 - Dinheiro - Transporte (uber) - João`
@@ -99,7 +225,12 @@ Olá! Eu sou seu assistente financeiro pessoal.
 📊 **Comandos disponíveis:**
 • /start - Mostra esta mensagem
 • /statistics - Gera relatórios e gráficos completos
+• /statistics preview - Relatório com gráficos mais leves (perfis: preview, chat, export, svg)
+• /statistics mes - Relatório só do mês atual (também `semana`, `hoje`, `10/2026` ou `01/10/2026 15/10/2026`)
+• /statistics usuario=maria categoria=lazer - Relatório filtrado por usuário e/ou categoria
+• /profile - Mostra ou troca o perfil de gráficos deste chat
 • /clearTable - Limpa todos os dados (cuidado!)
+• /clearTable arquivar - Guarda os dados em uma aba datada e limpa a tabela
 
 📈 **Relatórios incluem:**
 • Resumo financeiro com saldo atual
@@ -120,11 +251,39 @@ Vamos começar a controlar suas finanças! 💰
     
     await update.message.reply_text(welcome_message, parse_mode='Markdown')
 
+@timed_handler('profile')
+async def render_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    profiles = ", ".join(f"`{name}`" for name in RENDER_PROFILES)
+    
+    if not context.args:
+        current = get_render_profile(context.chat_data.get('render_profile'))
+        await update.message.reply_text(
+            f"🖼️ Perfil de gráficos atual: `{current.name}` ({current.dpi} dpi, {current.format.upper()})\n\n"
+            f"Perfis disponíveis: {profiles}\n"
+            "Use `/profile nome` para trocar ou `/statistics nome` só para um relatório.",
+            parse_mode='Markdown'
+        )
+        return
+    
+    name = context.args[0].lower()
+    if name not in RENDER_PROFILES:
+        await update.message.reply_text(f"❌ Perfil desconhecido. Perfis disponíveis: {profiles}", parse_mode='Markdown')
+        return
+    
+    context.chat_data['render_profile'] = name
+    profile = RENDER_PROFILES[name]
+    await update.message.reply_text(f"✅ Perfil de gráficos alterado para `{name}` ({profile.dpi} dpi, {profile.format.upper()})", parse_mode='Markdown')
+
+@timed_handler('clearTable')
 async def clear_table(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        success = bot_manager.sheets_manager.clear_table()
+        archive = any(arg.lower() == 'arquivar' for arg in context.args or [])
+        bot_manager = await _manager(update.effective_chat.id)
+        success = await bot_manager.sheets.clear_table(archive)
         
-        if success:
+        if success and archive:
+            message = "✅ Tabela limpa com sucesso! Os dados foram movidos para uma nova aba com a data de hoje."
+        elif success:
             message = "✅ Tabela limpa com sucesso! Todos os dados foram removidos."
         else:
             message = "❌ Erro ao limpar a tabela. Tente novamente."
@@ -133,55 +292,219 @@ async def clear_table(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
     except Exception as e:
         logger.error(f"Erro no comando clear_table: {e}")
+        count_error('clearTable', e)
         await update.message.reply_text("❌ Erro interno. Tente novamente mais tarde.")
 
+@timed_handler('statistics')
 async def statistics(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    args = [arg.lower() for arg in context.args or []]
+    profile_name = next((arg for arg in args if arg in RENDER_PROFILES), None)
+    profile_name = profile_name or context.chat_data.get('render_profile')
+    
     try:
-        await update.message.reply_text("📊 Gerando estatísticas... Por favor, aguarde.")
-        
-        data = bot_manager.sheets_manager.get_all_data()
+        now = datetime.now(pytz.timezone('America/Sao_Paulo')).replace(tzinfo=None)
+        report_filter = parse_report_filter([arg for arg in args if arg not in RENDER_PROFILES], now)
+    except ValueError:
+        await update.message.reply_text(FILTER_USAGE, parse_mode='Markdown')
+        return
+    
+    try:
+        bot_manager = await _manager(update.effective_chat.id)
+        await update.message.reply_text(
+            "📊 Gerando estatísticas... Por favor, aguarde." + _queued_notice(bot_manager, 'read')
+        )
         
-        if not data:
-            await update.message.reply_text("📈 Nenhum dado encontrado para gerar estatísticas. Adicione algumas despesas primeiro!")
+        if report_filter:
+            stats_gen = await _filtered_statistics(update.message, report_filter, profile_name)
+        else:
+            stats_gen = await _full_statistics(update.message, profile_name)
+        if stats_gen is None:
             return
         
-        stats_gen = StatisticsGenerator(data)
-        
-        summary = stats_gen.get_summary_text()
-        await update.message.reply_text(summary, parse_mode='Markdown')
-        
-        charts = stats_gen.generate_all_statistics()
-        
-        chart_names = {
-            'gastos_por_pessoa': '👥 Gastos por Pessoa',
-            'meio_pagamento': '💳 Meios de Pagamento',
-            'compras_por_categoria': '🏷️ Compras por Categoria',
-            'total_gasto_mes': '📅 Total Gasto por Mês',
-            'gastos_por_dia': '📈 Gastos por Dia',
-            'credito_vs_debito': '⚖️ Créditos vs Débitos',
-            'debitos_acumulados': '📊 Débitos Acumulados'
-        }
-        
-        for chart_key, chart_buffer in charts.items():
-            if chart_buffer:
-                chart_buffer.seek(0)
-                caption = chart_names.get(chart_key, chart_key)
-                
-                await update.message.reply_photo(
-                    photo=InputFile(chart_buffer, filename=f'{chart_key}.png'),
-                    caption=caption
-                )
+        with STATISTICS_SECONDS.time(step='send'):
+            if os.getenv('STATISTICS_SEND_MODE', 'stream') == 'album':
+                await _send_charts_album(update.message, stats_gen)
+            else:
+                await _send_charts_stream(update.message, stats_gen)
         
         await update.message.reply_text("✅ Relatório completo enviado!")
         
     except Exception as e:
         logger.error(f"Erro no comando statistics: {e}")
+        count_error('statistics', e)
         await update.message.reply_text("❌ Erro ao gerar estatísticas. Tente novamente mais tarde.")
 
+async def _full_statistics(message, profile_name):
+    bot_manager = await _manager(message.chat_id)
+    # Com os agregados já carregados o resumo sai antes mesmo de ler a planilha
+    aggregates = bot_manager.aggregates
+    summary_sent = aggregates.loaded and aggregates.total_transacoes > 0
+    if summary_sent:
+        early_summary = aggregates.summary_text()
+        await message.reply_text(early_summary, parse_mode='Markdown')
+    
+    try:
+        with STATISTICS_SECONDS.time(step='fetch'):
+            values = await bot_manager.sheets.get_all_values()
+    except Exception as e:
+        logger.error(f"Erro ao obter dados: {e}")
+        count_error('statistics.fetch', e)
+        await message.reply_text("❌ Erro ao ler a planilha para gerar estatísticas. Tente novamente mais tarde.")
+        return None
+    
+    if len(values) <= 1:
+        await message.reply_text("📈 Nenhum dado encontrado para gerar estatísticas. Adicione algumas despesas primeiro!")
+        return None
+    
+    # Recarrega os agregados na primeira vez ou se divergirem do histórico lido
+    if not aggregates.loaded or aggregates.total_transacoes != len(values) - 1:
+        await asyncio.to_thread(aggregates.load, values[1:])
+    
+    if not summary_sent:
+        await message.reply_text(aggregates.summary_text(), parse_mode='Markdown')
+    elif aggregates.summary_text() != early_summary:
+        # O resumo adiantado estava desatualizado: manda o que bate com os gráficos
+        await message.reply_text(f"🔄 *Resumo atualizado*\n\n{aggregates.summary_text()}", parse_mode='Markdown')
+    
+    statistics_module = await _statistics_module()
+    with STATISTICS_SECONDS.time(step='build'):
+        return await asyncio.to_thread(statistics_module.StatisticsGenerator.from_values, values, profile_name)
+
+async def _filtered_statistics(message, report_filter, profile_name):
+    bot_manager = await _manager(message.chat_id)
+    # O filtro vai até o backend: só as linhas do período são lidas
+    try:
+        with STATISTICS_SECONDS.time(step='fetch'):
+            values = await bot_manager.sheets.get_filtered_values(report_filter)
+    except Exception as e:
+        logger.error(f"Erro ao obter dados: {e}")
+        count_error('statistics.fetch', e)
+        await message.reply_text("❌ Erro ao ler a planilha para gerar estatísticas. Tente novamente mais tarde.")
+        return None
+    
+    statistics_module = await _statistics_module()
+    with STATISTICS_SECONDS.time(step='build'):
+        stats_gen = await asyncio.to_thread(
+            statistics_module.StatisticsGenerator.from_values, values, profile_name, report_filter
+        )
+    if stats_gen.df.empty:
+        await message.reply_text(f"{describe_filter(report_filter)}\n\n📈 Nenhuma transação encontrada com esse filtro.", parse_mode='Markdown')
+        return None
+    
+    await message.reply_text(f"{describe_filter(report_filter)}\n\n{stats_gen.get_summary_text()}", parse_mode='Markdown')
+    return stats_gen
+
+async def _send_charts_stream(message, stats_gen):
+    # Calcula e faz o hash dos dados de cada gráfico: fora do event loop
+    digests = await asyncio.to_thread(stats_gen.chart_digests)
+    file_ids = get_file_id_cache()
+    cached = {k: file_ids.get(d) for k, d in digests.items()}
+    
+    # Gráficos já enviados antes com o mesmo conteúdo nem são renderizados
+    futures = stats_gen.submit_charts([k for k in digests if not cached[k]])
+    for chart_key, file_id in cached.items():
+        if not file_id:
+            continue
+        try:
+            await _send_chart(message, stats_gen, chart_key, file_id)
+        except TelegramError as e:
+            logger.warning(f"file_id do gráfico {chart_key} rejeitado, reenviando o PNG: {e}")
+            count_error('telegram.file_id', e)
+            file_ids.discard(digests[chart_key])
+            futures.update(stats_gen.submit_charts([chart_key]))
+    
+    # Cada gráfico é enviado assim que termina de renderizar
+    for next_chart in asyncio.as_completed([_wait_chart(k, f) for k, f in futures.items()]):
+        chart_key, chart_png = await next_chart
+        if chart_png:
+            sent = await _send_chart(message, stats_gen, chart_key, _chart_file(stats_gen, chart_key, chart_png))
+            file_ids.put(digests[chart_key], _sent_file_id(sent))
+
+async def _send_charts_album(message, stats_gen):
+    digests = await asyncio.to_thread(stats_gen.chart_digests)
+    file_ids = get_file_id_cache()
+    cached = {k: file_ids.get(d) for k, d in digests.items()}
+    
+    futures = stats_gen.submit_charts([k for k in digests if not cached[k]])
+    photos = {}
+    for chart_key in digests:
+        if cached[chart_key]:
+            photos[chart_key] = cached[chart_key]
+        else:
+            _, chart_png = await _wait_chart(chart_key, futures[chart_key])
+            if chart_png:
+                photos[chart_key] = _chart_file(stats_gen, chart_key, chart_png)
+    
+    # O Telegram aceita no máximo 10 itens por álbum
+    media_class = InputMediaPhoto if stats_gen.profile.format == 'png' else InputMediaDocument
+    keys = list(photos)
+    for i in range(0, len(keys), MEDIA_GROUP_LIMIT):
+        chunk = keys[i:i + MEDIA_GROUP_LIMIT]
+        try:
+            if len(chunk) == 1:
+                sent = [await _send_chart(message, stats_gen, chunk[0], photos[chunk[0]])]
+            else:
+                with TELEGRAM_UPLOAD_SECONDS.time(method='album'):
+                    sent = await message.reply_media_group(media=[
+                        media_class(media=photos[k], caption=CHART_NAMES.get(k, k)) for k in chunk
+                    ])
+        except TelegramError as e:
+            count_error('telegram.album', e)
+            logger.warning(f"Falha ao enviar o álbum de gráficos, enviando um a um: {e}")
+            await _send_charts_individually(message, stats_gen, chunk, photos, digests, file_ids)
+            continue
+        
+        for chart_key, sent_message in zip(chunk, sent):
+            file_ids.put(digests[chart_key], _sent_file_id(sent_message))
+
+async def _send_charts_individually(message, stats_gen, chart_keys, photos, digests, file_ids):
+    for chart_key in chart_keys:
+        photo = photos[chart_key]
+        if isinstance(photo, str):
+            # Um file_id inválido pode ter derrubado o álbum, então o PNG é renderizado de novo
+            file_ids.discard(digests[chart_key])
+            future = stats_gen.submit_charts([chart_key])[chart_key]
+            _, chart_png = await _wait_chart(chart_key, future)
+            if not chart_png:
+                continue
+            photo = _chart_file(stats_gen, chart_key, chart_png)
+        
+        sent = await _send_chart(message, stats_gen, chart_key, photo)
+        file_ids.put(digests[chart_key], _sent_file_id(sent))
+
+def _chart_file(stats_gen, chart_key, chart_bytes):
+    return InputFile(chart_bytes, filename=f'{chart_key}.{stats_gen.profile.format}')
+
+def _sent_file_id(sent):
+    return sent.photo[-1].file_id if sent.photo else sent.document.file_id
+
+async def _send_chart(message, stats_gen, chart_key, photo):
+    caption = CHART_NAMES.get(chart_key, chart_key)
+    # O Telegram só aceita PNG/JPEG como foto; SVG vai como documento
+    if stats_gen.profile.format != 'png':
+        with TELEGRAM_UPLOAD_SECONDS.time(method='document'):
+            return await message.reply_document(document=photo, caption=caption)
+    with TELEGRAM_UPLOAD_SECONDS.time(method='photo'):
+        return await message.reply_photo(photo=photo, caption=caption)
+
+async def _wait_chart(chart_key, future):
+    try:
+        return chart_key, await asyncio.wrap_future(future)
+    except Exception as e:
+        logger.error(f"Erro ao renderizar gráfico {chart_key}: {e}")
+        count_error('chart_render', e)
+        return chart_key, None
+
+@timed_handler('expense')
 async def handle_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         message_text = update.message.text
         
+        bot_manager = await _manager(update.effective_chat.id)
+        if len(message_text.strip().splitlines()) > 1:
+            await _handle_batch(update, context, bot_manager, message_text)
+            return
+        
         expense_data = bot_manager.parse_expense(message_text)
         
         if not expense_data:
@@ -198,39 +521,227 @@ async def handle_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         if expense_data['tipo'] == 'credito':
-            success = bot_manager.sheets_manager.add_credit(expense_data['valor'])
-            if success:
-                await update.message.reply_text(
-                    f"✅ Crédito registrado com sucesso! ➕\n\n"
-                    f"💰 Valor: R$ {expense_data['valor']:.2f}"
-                )
-            else:
-                await update.message.reply_text("❌ Erro ao registrar crédito. Tente novamente.")
+            future = await bot_manager.sheets.add_credit(expense_data['valor'], entry_id=_entry_id(update))
+            details = f"💰 Valor: R$ {expense_data['valor']:.2f}"
+            pending_text = f"📝 Crédito registrado! Salvando na planilha... ⏳\n\n{details}"
+            success_text = f"✅ Crédito registrado com sucesso! ➕\n\n{details}"
+            error_text = "❌ Erro ao registrar crédito. Tente novamente."
         else:
-            success = bot_manager.sheets_manager.add_expense(
+            future = await bot_manager.sheets.add_expense(
                 expense_data['valor'],
                 expense_data['meio_pagamento'],
                 expense_data['categoria'],
                 expense_data['descricao'],
-                expense_data['usuario']
+                expense_data['usuario'],
+                entry_id=_entry_id(update)
             )
-            
-            if success:
-                await update.message.reply_text(
-                    f"✅ Despesa registrada com sucesso! ➖\n\n"
-                    f"💰 Valor: R$ {expense_data['valor']:.2f}\n"
-                    f"💳 Meio: {expense_data['meio_pagamento']}\n"
-                    f"🏷️ Categoria: {expense_data['categoria']}\n"
-                    f"📝 Descrição: {expense_data['descricao']}\n"
-                    f"👤 Usuário: {expense_data['usuario']}"
-                )
-            else:
-                await update.message.reply_text("❌ Erro ao registrar despesa. Tente novamente.")
+            details = (
+                f"💰 Valor: R$ {expense_data['valor']:.2f}\n"
+                f"💳 Meio: {expense_data['meio_pagamento']}\n"
+                f"🏷️ Categoria: {expense_data['categoria']}\n"
+                f"📝 Descrição: {expense_data['descricao']}\n"
+                f"👤 Usuário: {expense_data['usuario']}"
+            )
+            pending_text = f"📝 Despesa registrada! Salvando na planilha... ⏳\n\n{details}"
+            success_text = f"✅ Despesa registrada com sucesso! ➖\n\n{details}"
+            error_text = "❌ Erro ao registrar despesa. Tente novamente."
+        
+        pending_text += _queued_notice(bot_manager, 'write')
+        # Responde na hora e edita a mensagem quando o lote for gravado na planilha
+        reply = await update.message.reply_text(pending_text)
+        context.application.create_task(
+            _confirm_write(reply, future, success_text, error_text, _slow_write_text(bot_manager, details)),
+            update=update
+        )
     
     except Exception as e:
         logger.error(f"Erro ao processar transação: {e}")
+        count_error('expense', e)
         await update.message.reply_text("❌ Erro interno. Tente novamente mais tarde.")
 
+# Sem resposta da planilha depois disso, avisa que a transação está segura no diário local
+SLOW_WRITE_NOTICE_AFTER = 10
+
+def _entry_id(update, part=None):
+    """Chave da update no diário local: um reenvio do Telegram não grava as linhas de novo"""
+    return f"u:{update.update_id}" if part is None else f"u:{update.update_id}:{part}"
+
+def _slow_write_text(bot_manager, details):
+    if not bot_manager.backend.journaled:
+        return None
+    return (
+        "💾 Salvo no diário local. A planilha não respondeu; a gravação será repetida "
+        f"até dar certo, sem precisar reenviar.\n\n{details}"
+    )
+
+async def _wait_write(future, slow_text=None, message=None):
+    """Resultado da gravação; passado SLOW_WRITE_NOTICE_AFTER, troca message por slow_text e continua esperando"""
+    waiting = asyncio.wrap_future(future)
+    if not slow_text:
+        return await waiting
+    try:
+        return await asyncio.wait_for(asyncio.shield(waiting), SLOW_WRITE_NOTICE_AFTER)
+    except asyncio.TimeoutError:
+        await message.edit_text(slow_text)
+        return await waiting
+
+async def _confirm_write(message, future, success_text, error_text, slow_text=None):
+    try:
+        success = await _wait_write(future, slow_text, message)
+    except Exception as e:
+        logger.error(f"Erro ao aguardar gravação na planilha: {e}")
+        count_error('write_confirm', e)
+        success = False
+
+    await message.edit_text(success_text if success else error_text)
+
+MESSAGE_LIMIT = 4000
+
+def _batch_line(number, line, data):
+    if data is None:
+        return f"❌ {number}. formato inválido: {line[:40]}"
+    if data['tipo'] == 'credito':
+        return f"✅ {number}. crédito R$ {data['valor']:.2f}"
+    return f"✅ {number}. R$ {data['valor']:.2f} · {data['categoria']} · {data['usuario']}"
+
+def _batch_report(header, lines):
+    report = header + "\n\n" + "\n".join(lines)
+    if len(report) > MESSAGE_LIMIT:
+        report = report[:MESSAGE_LIMIT].rsplit("\n", 1)[0] + "\n…"
+    return report
+
+async def _handle_batch(update, context, bot_manager, message_text):
+    """Mensagem com várias linhas: todas as transações válidas vão em uma única gravação"""
+    parsed = bot_manager.parse_batch(message_text)
+    valid = [data for _, _, data in parsed if data]
+    lines = [_batch_line(number, line, data) for number, line, data in parsed]
+    invalid = len(parsed) - len(valid)
+    
+    if not valid:
+        await update.message.reply_text(_batch_report(
+            "❌ Nenhuma linha válida. Use \"valor - meio de pagamento - categoria (descrição) - usuário\" "
+            "ou \"valor - credito\", uma transação por linha.", lines
+        ))
+        return
+    
+    future = await bot_manager.sheets.add_transactions(valid, entry_id=_entry_id(update))
+    summary = f"{len(valid)} transações" + (f", {invalid} com erro" if invalid else "")
+    
+    header = f"📝 {summary}. Salvando na planilha... ⏳" + _queued_notice(bot_manager, 'write')
+    reply = await update.message.reply_text(_batch_report(header, lines))
+    context.application.create_task(
+        _confirm_write(
+            reply, future,
+            _batch_report(f"✅ Lote registrado com sucesso! {summary}.", lines),
+            f"❌ Erro ao registrar o lote de {len(valid)} transações. Tente novamente.",
+            _slow_write_text(bot_manager, summary)
+        ),
+        update=update
+    )
+
+# Limite de download de arquivos da Bot API
+MAX_STATEMENT_SIZE = 20 * 1024 * 1024
+
+def _statement_defaults(caption, user):
+    """Valores padrão das colunas que o extrato não traz: `usuario=`, `meio=` e `categoria=` na legenda"""
+    defaults = {
+        'usuario': user.first_name if user else 'importado',
+        'meio_pagamento': statement_import.DEFAULT_MEIO_PAGAMENTO,
+        'categoria': statement_import.DEFAULT_CATEGORIA,
+    }
+    keys = {'usuario': 'usuario', 'usuário': 'usuario', 'meio': 'meio_pagamento', 'categoria': 'categoria'}
+    for token in (caption or '').split():
+        key, _, value = token.partition('=')
+        if key.lower() in keys and value:
+            defaults[keys[key.lower()]] = value
+    return defaults
+
+@timed_handler('document')
+async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    document = update.message.document
+    kind = statement_import.statement_kind(document.file_name)
+    if not kind:
+        await update.message.reply_text("❌ Envie um extrato em CSV ou OFX para importar.")
+        return
+    if document.file_size and document.file_size > MAX_STATEMENT_SIZE:
+        await update.message.reply_text("❌ Arquivo grande demais: o Telegram só permite baixar até 20 MB.")
+        return
+    
+    defaults = _statement_defaults(update.message.caption, update.effective_user)
+    progress = await update.message.reply_text(f"📥 Importando {document.file_name}...")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"extrato.{kind}")
+            telegram_file = await context.bot.get_file(document.file_id)
+            await telegram_file.download_to_drive(path)
+            await _import_statement(progress, path, kind, defaults, update)
+    except ValueError as e:
+        # Erros do parser do extrato (colunas, datas, valores) são do arquivo do usuário
+        await progress.edit_text(f"❌ Erro ao importar o extrato: {e}")
+    except Exception as e:
+        logger.error(f"Erro ao importar extrato: {e}")
+        count_error('document', e)
+        await progress.edit_text("❌ Erro interno ao importar o extrato. Tente novamente mais tarde.")
+
+async def _import_statement(progress, path, kind, defaults, update):
+    """Lê o extrato em fatias de IMPORT_CHUNK_SIZE e grava cada fatia com um único add_rows"""
+    bot_manager = await _manager(progress.chat_id)
+    chunk_size = int(os.getenv('IMPORT_CHUNK_SIZE', '500'))
+    imported, errors, chunks = 0, [], 0
+    last_edit = time.monotonic()
+    
+    with statement_import.open_statement(path) as lines:
+        transactions = statement_import.iter_statement(lines, kind, defaults)
+        done = False
+        while not done:
+            chunk, chunk_errors, done = await asyncio.to_thread(
+                statement_import.next_chunk, transactions, chunk_size
+            )
+            errors.extend(chunk_errors)
+            if chunk:
+                chunks += 1
+                future = await bot_manager.sheets.add_transactions(chunk, entry_id=_entry_id(update, chunks))
+                slow_text = None
+                if bot_manager.backend.journaled:
+                    slow_text = (
+                        f"💾 Importando... {imported + len(chunk)} transações salvas localmente, "
+                        "sincronizando com a planilha. Não precisa reenviar o arquivo."
+                    )
+                if not await _wait_write(future, slow_text, progress):
+                    await progress.edit_text(
+                        f"❌ Erro ao gravar na planilha. {imported} transações foram importadas antes da falha."
+                    )
+                    return
+                imported += len(chunk)
+            
+            # Edita a mensagem no máximo a cada 2s para não esbarrar no limite do Telegram
+            if not done and time.monotonic() - last_edit >= 2:
+                await progress.edit_text(
+                    f"📥 Importando... {imported} transações gravadas" + _queued_notice(bot_manager, 'write')
+                )
+                last_edit = time.monotonic()
+    
+    report = f"✅ Extrato importado: {imported} transações gravadas."
+    if errors:
+        shown = ", ".join(str(number) for number in errors[:10])
+        report += f"\n⚠️ {len(errors)} linhas com erro ({shown}{', ...' if len(errors) > 10 else ''})"
+    await progress.edit_text(report)
+
+async def drop_duplicate_updates(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Registrado no grupo -1: reenvios do Telegram param aqui e não gravam a despesa de novo"""
+    if get_update_deduplicator().is_duplicate(update):
+        logger.warning(f"Update {update.update_id} repetida descartada")
+        raise ApplicationHandlerStop
+
+async def flush_pending_writes(application):
+    """Grava as linhas pendentes de todos os livros-caixa antes de encerrar o bot"""
+    if _tenant_cache is not None:
+        await asyncio.to_thread(_tenant_cache.close)
+    sheets_client.close_shared_clients()
+    get_update_deduplicator().close()
+    await asyncio.to_thread(get_file_id_cache().flush)
+
+@timed_handler('unknown')
 async def handle_unknown(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "❓ Comando não reconhecido.\n\n"
@@ -239,26 +750,39 @@ async def handle_unknown(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='Markdown'
     )
 
-def main():
-    os.makedirs('logs', exist_ok=True)
-    
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    if not token:
-        logger.error("TELEGRAM_BOT_TOKEN não encontrado no .env")
-        return
-    
-    application = Application.builder().token(token).build()
-    
+def register_handlers(application):
+    """Handlers do bot, os mesmos no polling, no webhook e nos benchmarks"""
+    application.add_handler(TypeHandler(Update, drop_duplicate_updates), group=-1)
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("clearTable", clear_table))
     application.add_handler(CommandHandler("statistics", statistics))
+    application.add_handler(CommandHandler("profile", render_profile))
     
     application.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND, 
         handle_expense
     ))
     
+    application.add_handler(MessageHandler(filters.Document.ALL, handle_document))
     application.add_handler(MessageHandler(filters.COMMAND, handle_unknown))
+
+def main():
+    os.makedirs('logs', exist_ok=True)
+    
+    token = os.getenv('TELEGRAM_BOT_TOKEN')
+    if not token:
+        logger.error("TELEGRAM_BOT_TOKEN não encontrado no .env")
+        return
+    
+    application = (
+        Application.builder()
+        .token(token)
+        .post_init(start_warm_up)
+        .post_shutdown(flush_pending_writes)
+        .build()
+    )
+    
+    register_handlers(application)
     
     logger.info("Bot iniciado!")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
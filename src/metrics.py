@@ -0,0 +1,201 @@
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+
+# Formato texto do Prometheus, servido no /metrics do modo webhook
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._function = None
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def set_function(self, function):
+        """Valor lido na hora da coleta: um número ou {tupla de labels: número}"""
+        self._function = function
+
+    def _collected(self):
+        if self._function is None:
+            with self._lock:
+                return dict(self._values)
+        value = self._function()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self):
+        for key, value in sorted(self._collected().items()):
+            yield f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, [('le', _format_value(float(bound)))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labels, key)} {count}'
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Reimportar o módulo (ou registrar de novo) devolve a métrica existente
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                print(f"Erro ao coletar a métrica {metric.name}: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+def counter(name, documentation, labels=()):
+    return REGISTRY.register(Counter(name, documentation, labels))
+
+def gauge(name, documentation, labels=()):
+    return REGISTRY.register(Gauge(name, documentation, labels))
+
+def histogram(name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labels, buckets))
+
+def render():
+    return REGISTRY.render()
+
+HANDLER_SECONDS = histogram(
+    'finance_bot_handler_seconds', 'Tempo de cada handler do Telegram até a resposta', ['handler']
+)
+PARSE_EXPENSE_SECONDS = histogram(
+    'finance_bot_parse_expense_seconds', 'Tempo do parse_expense por mensagem', buckets=FAST_BUCKETS
+)
+SHEETS_API_SECONDS = histogram(
+    'finance_bot_sheets_api_seconds', 'Duração de cada requisição ao Google Sheets', ['method']
+)
+SHEETS_QUEUE_SECONDS = histogram(
+    'finance_bot_sheets_queue_seconds', 'Espera por cota e vaga antes de cada requisição ao Sheets', ['kind']
+)
+STATISTICS_SECONDS = histogram(
+    'finance_bot_statistics_seconds', 'Etapas do /statistics (leitura, montagem do DataFrame, envio)', ['step']
+)
+CHART_SECONDS = histogram(
+    'finance_bot_chart_seconds',
+    'Gráficos do /statistics: agregado (stage=data) e renderização, incluindo a espera por um worker (stage=render)',
+    ['chart', 'stage']
+)
+TELEGRAM_UPLOAD_SECONDS = histogram(
+    'finance_bot_telegram_upload_seconds', 'Envio de gráficos ao Telegram', ['method']
+)
+ERRORS = counter('finance_bot_errors_total', 'Erros por origem e tipo de exceção', ['where', 'type'])
+UPDATE_QUEUE_DEPTH = gauge('finance_bot_update_queue_depth', 'Updates aguardando na fila do webhook')
+UPDATE_QUEUE_IN_FLIGHT = gauge('finance_bot_update_queue_in_flight', 'Updates sendo processadas no webhook')
+UPDATES = counter('finance_bot_updates_total', 'Updates do webhook por resultado', ['result'])
+
+def count_error(where, error):
+    ERRORS.inc(where=where, type=type(error).__name__)
+
+def timed(histogram_metric, **labels):
+    """Decorator que observa a duração de uma função síncrona"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with histogram_metric.time(**labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def timed_handler(name):
+    """Decorator dos handlers: latência em HANDLER_SECONDS e exceções não tratadas em ERRORS"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(update, context):
+            started = time.perf_counter()
+            try:
+                return await handler(update, context)
+            except Exception as e:
+                count_error(name, e)
+                raise
+            finally:
+                HANDLER_SECONDS.observe(time.perf_counter() - started, handler=name)
+        return wrapper
+    return decorator
@@ -0,0 +1,71 @@
+import time
+import threading
+
+class TokenBucket:
+    """
+    Token bucket: permite rajadas de até burst requisições e depois rate por
+    segundo. reserve() consome o token na hora (o saldo pode ficar negativo) e
+    retorna quantos segundos esperar por ele, então quem chega primeiro é
+    atendido primeiro.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            delay = max(0.0, -self._tokens / self.rate)
+            if delay:
+                self.throttled += 1
+                self.total_wait += delay
+            return delay
+
+    def try_acquire(self, tokens=1):
+        """Consome o token se houver; senão não consome nada e retorna os segundos até haver"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def drain(self):
+        """Zera o saldo (ex.: depois de um 429, quando a cota real já acabou)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    def estimated_wait(self, tokens=1):
+        """Segundos até o próximo token, sem consumir"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def wait(self, tokens=1):
+        """Bloqueia a thread atual até o token estar disponível"""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate_per_minute': round(self.rate * 60, 2),
+                'burst': self.burst,
+                'throttled': self.throttled,
+                'total_wait_s': round(self.total_wait, 2),
+            }
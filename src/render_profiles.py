@@ -0,0 +1,18 @@
+import os
+from collections import namedtuple
+
+RenderProfile = namedtuple('RenderProfile', ['name', 'dpi', 'format', 'scale'])
+
+RENDER_PROFILES = {
+    'preview': RenderProfile('preview', dpi=100, format='png', scale=0.8),
+    'chat': RenderProfile('chat', dpi=150, format='png', scale=1.0),
+    'export': RenderProfile('export', dpi=300, format='png', scale=1.0),
+    'svg': RenderProfile('svg', dpi=100, format='svg', scale=1.0),
+}
+
+DEFAULT_RENDER_PROFILE = 'chat'
+
+def get_render_profile(name=None):
+    """Perfil pelo nome; sem nome usa o RENDER_PROFILE do ambiente (padrão: chat)"""
+    name = name or os.getenv('RENDER_PROFILE', DEFAULT_RENDER_PROFILE)
+    return RENDER_PROFILES.get(name.lower(), RENDER_PROFILES[DEFAULT_RENDER_PROFILE])
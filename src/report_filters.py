@@ -0,0 +1,83 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+ReportFilter = namedtuple('ReportFilter', ['start', 'end', 'usuario', 'categoria'])
+
+FILTER_USAGE = (
+    "Filtros do /statistics:\n"
+    "• `mes` ou `semana` - mês ou semana atual\n"
+    "• `hoje` - apenas hoje\n"
+    "• `10/2026` - um mês específico\n"
+    "• `01/10/2026 15/10/2026` - intervalo de datas (ou uma data só)\n"
+    "• `usuario=maria` e `categoria=lazer` - apenas débitos desse usuário/categoria"
+)
+
+def _start_of_day(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _end_of_day(moment):
+    return moment.replace(hour=23, minute=59, second=59, microsecond=0)
+
+def _month_range(year, month):
+    start = datetime(year, month, 1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, _end_of_day(next_month - timedelta(days=1))
+
+def parse_report_filter(args, now):
+    """
+    Interpreta os argumentos do /statistics. Retorna None sem filtros e levanta
+    ValueError para argumentos desconhecidos. now é o horário local (sem tz).
+    """
+    start = end = usuario = categoria = None
+    dates = []
+
+    for arg in args:
+        arg = arg.strip().lower()
+        if arg in ('mes', 'mês'):
+            start, end = _month_range(now.year, now.month)
+        elif arg == 'semana':
+            start = _start_of_day(now - timedelta(days=now.weekday()))
+            end = _end_of_day(start + timedelta(days=6))
+        elif arg == 'hoje':
+            start, end = _start_of_day(now), _end_of_day(now)
+        elif arg.startswith(('usuario=', 'usuário=')):
+            usuario = arg.split('=', 1)[1].replace(' ', '')
+        elif arg.startswith('categoria='):
+            categoria = arg.split('=', 1)[1].replace(' ', '')
+        elif arg.count('/') == 2:
+            dates.append(datetime.strptime(arg, '%d/%m/%Y'))
+        elif arg.count('/') == 1:
+            month = datetime.strptime(arg, '%m/%Y')
+            start, end = _month_range(month.year, month.month)
+        else:
+            raise ValueError(f"Argumento desconhecido: {arg}")
+
+    if dates:
+        dates.sort()
+        start, end = _start_of_day(dates[0]), _end_of_day(dates[-1])
+
+    if start is None and usuario is None and categoria is None:
+        return None
+    return ReportFilter(start, end, usuario or None, categoria or None)
+
+def describe_filter(report_filter):
+    parts = []
+    if report_filter.start:
+        parts.append(f"{report_filter.start:%d/%m/%Y} a {report_filter.end:%d/%m/%Y}")
+    if report_filter.usuario:
+        parts.append(f"usuário {report_filter.usuario}")
+    if report_filter.categoria:
+        parts.append(f"categoria {report_filter.categoria}")
+    return "🔎 **Filtro**: " + " · ".join(parts)
+
+def sortable_range(report_filter):
+    """Limites do período no formato 'aaaa-mm-dd HH:MM:SS', comparáveis como texto"""
+    return f"{report_filter.start:%Y-%m-%d}", f"{report_filter.end:%Y-%m-%d %H:%M:%S}"
+
+def row_matches(row, report_filter):
+    """Filtros de usuário e categoria sobre uma linha da planilha"""
+    if report_filter.usuario and row[5] != report_filter.usuario:
+        return False
+    if report_filter.categoria and row[3] != report_filter.categoria:
+        return False
+    return True
@@ -0,0 +1,102 @@
+import os
+import threading
+from datetime import datetime, timedelta
+import gspread
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+class SheetsRetry(Retry):
+    """
+    Retry com backoff exponencial para a API do Sheets. 429 é repetido para
+    qualquer método (a requisição foi recusada antes de executar); 5xx só para
+    métodos idempotentes, já que um append (POST) pode ter sido gravado mesmo
+    com erro na resposta.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+def create_session(credentials, pool_size=10, max_retries=5, backoff=0.5):
+    """AuthorizedSession com keep-alive, pool de conexões e SheetsRetry"""
+    retry = SheetsRetry(
+        total=max_retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = AuthorizedSession(credentials)
+    session.mount('https://', adapter)
+    return session
+
+class TokenRefresher:
+    """
+    Renova o token de acesso em segundo plano antes de expirar, para que
+    nenhuma chamada ao Sheets espere pela renovação.
+    """
+
+    def __init__(self, credentials, margin=300, interval=60):
+        self.credentials = credentials
+        self.margin = timedelta(seconds=margin)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sheets-token', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def refresh_if_needed(self):
+        expiry = self.credentials.expiry
+        # expiry do google-auth é um datetime UTC sem tzinfo
+        if self.credentials.token is None or expiry is None or expiry - datetime.utcnow() < self.margin:
+            self.credentials.refresh(Request())
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh_if_needed()
+            except Exception as e:
+                print(f"Erro ao renovar o token do Google (nova tentativa em {self.interval}s): {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+def connect(credentials_path):
+    """Credenciais, sessão HTTP e cliente gspread; não faz nenhuma requisição"""
+    credentials = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+    session = create_session(
+        credentials,
+        pool_size=int(os.getenv('SHEETS_POOL_SIZE') or os.getenv('SHEETS_MAX_WORKERS', '4')),
+        max_retries=int(os.getenv('SHEETS_MAX_RETRIES', '5')),
+        backoff=float(os.getenv('SHEETS_RETRY_BACKOFF', '0.5'))
+    )
+    return credentials, gspread.Client(credentials, session=session)
+
+# Um cliente (e pool HTTP) por arquivo de credenciais, dividido por todas as planilhas abertas
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+def shared_client(credentials_path):
+    """Cliente gspread compartilhado, com o token renovado em segundo plano"""
+    with _shared_lock:
+        if credentials_path not in _shared_clients:
+            credentials, client = connect(credentials_path)
+            refresher = TokenRefresher(credentials)
+            refresher.start()
+            _shared_clients[credentials_path] = (client, refresher)
+        return _shared_clients[credentials_path][0]
+
+def close_shared_clients():
+    with _shared_lock:
+        for _, refresher in _shared_clients.values():
+            refresher.stop()
+        _shared_clients.clear()
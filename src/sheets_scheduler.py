@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+import threading
+from gspread.exceptions import APIError
+from .rate_limit import TokenBucket
+from .metrics import SHEETS_API_SECONDS, SHEETS_QUEUE_SECONDS, count_error
+
+logger = logging.getLogger(__name__)
+
+READ = 'read'
+WRITE = 'write'
+
+class SheetsScheduler:
+    """
+    Ponto único por onde passam as requisições ao Sheets de todas as
+    planilhas do processo. Leituras e escritas têm cada uma o seu token bucket
+    (as cotas do Google são separadas) e dividem max_concurrent vagas de
+    execução; na disputa por uma vaga as escritas passam na frente das
+    leituras. Um 429 que passou pelos retries da sessão zera o bucket e a
+    chamada volta para a fila em vez de falhar.
+    """
+
+    def __init__(self, read_per_minute=50, write_per_minute=50, burst=10, max_concurrent=4, max_attempts=4):
+        self.buckets = {
+            READ: TokenBucket(read_per_minute / 60, burst),
+            WRITE: TokenBucket(write_per_minute / 60, burst),
+        }
+        self.max_concurrent = max_concurrent
+        self.max_attempts = max_attempts
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = {READ: 0, WRITE: 0}
+        # Escritas que já têm token e só esperam uma vaga: bloqueiam as leituras
+        self._writes_ready = 0
+        self._stats = {kind: {'completed': 0, 'throttled': 0, 'quota_errors': 0, 'total_wait': 0.0} for kind in self.buckets}
+        self.coalesced_reads = 0
+
+    def _acquire(self, kind):
+        bucket = self.buckets[kind]
+        throttled = False
+        with self._cond:
+            self._waiting[kind] += 1
+            try:
+                # Primeiro o token da cota, depois a vaga de execução
+                while True:
+                    delay = bucket.try_acquire()
+                    if not delay:
+                        break
+                    throttled = True
+                    self._cond.wait(delay)
+
+                if kind == WRITE:
+                    self._writes_ready += 1
+                try:
+                    while self._running >= self.max_concurrent or (kind == READ and self._writes_ready):
+                        self._cond.wait()
+                finally:
+                    if kind == WRITE:
+                        self._writes_ready -= 1
+                self._running += 1
+            finally:
+                self._waiting[kind] -= 1
+            self._stats[kind]['throttled'] += throttled
+
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def call(self, kind, fn, *args, **kwargs):
+        """Executa fn (uma chamada ao gspread) quando houver cota e vaga; bloqueia a thread atual"""
+        method = getattr(fn, '__name__', 'call')
+        for attempt in range(1, self.max_attempts + 1):
+            enqueued_at = time.monotonic()
+            self._acquire(kind)
+            started_at = time.monotonic()
+            waited = started_at - enqueued_at
+            SHEETS_QUEUE_SECONDS.observe(waited, kind=kind)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                count_error(f'sheets.{method}', e)
+                if not isinstance(e, APIError) or e.response.status_code != 429 or attempt == self.max_attempts:
+                    raise
+                # A cota real acabou antes da estimada: todos esperam o bucket encher de novo
+                self.buckets[kind].drain()
+                with self._cond:
+                    self._stats[kind]['quota_errors'] += 1
+                logger.warning(f"Cota de {kind} do Sheets esgotada, requisição de volta para a fila ({attempt}/{self.max_attempts})")
+                continue
+            finally:
+                SHEETS_API_SECONDS.observe(time.monotonic() - started_at, method=method)
+                self._release()
+                with self._cond:
+                    self._stats[kind]['total_wait'] += waited
+
+            with self._cond:
+                self._stats[kind]['completed'] += 1
+            return result
+
+    def record_coalesced(self):
+        with self._cond:
+            self.coalesced_reads += 1
+
+    def estimated_wait(self, kind):
+        """Segundos que uma requisição feita agora esperaria na fila (estimativa)"""
+        bucket = self.buckets[kind]
+        with self._cond:
+            ahead = self._waiting[kind]
+        return bucket.estimated_wait(ahead + 1)
+
+    def metrics(self):
+        with self._cond:
+            metrics = {'running': self._running, 'max_concurrent': self.max_concurrent, 'coalesced_reads': self.coalesced_reads}
+            for kind, stats in self._stats.items():
+                metrics[kind] = {
+                    'waiting': self._waiting[kind],
+                    'completed': stats['completed'],
+                    'throttled': stats['throttled'],
+                    'quota_errors': stats['quota_errors'],
+                    'total_wait_s': round(stats['total_wait'], 2),
+                    'rate_per_minute': round(self.buckets[kind].rate * 60, 2),
+                }
+            return metrics
+
+_sheets_scheduler = None
+_sheets_scheduler_lock = threading.Lock()
+
+def get_sheets_scheduler():
+    global _sheets_scheduler
+    with _sheets_scheduler_lock:
+        if _sheets_scheduler is None:
+            _sheets_scheduler = SheetsScheduler(
+                read_per_minute=float(os.getenv('SHEETS_READ_PER_MINUTE', '50')),
+                write_per_minute=float(os.getenv('SHEETS_WRITE_PER_MINUTE', '50')),
+                burst=int(os.getenv('SHEETS_QUOTA_BURST', '10')),
+                max_concurrent=int(os.getenv('SHEETS_POOL_SIZE') or os.getenv('SHEETS_MAX_WORKERS', '4'))
+            )
+        return _sheets_scheduler
@@ -0,0 +1,194 @@
+import os
+import re
+import csv
+import unicodedata
+from datetime import datetime
+from .storage import DATE_FORMAT
+
+STATEMENT_KINDS = ('csv', 'ofx')
+
+DEFAULT_MEIO_PAGAMENTO = 'extrato'
+DEFAULT_CATEGORIA = 'importado'
+
+# Cabeçalhos aceitos no CSV, já sem acentos, espaços e pontuação. Os da
+# própria planilha vêm primeiro, então um CSV exportado dela volta igual.
+CSV_COLUMNS = {
+    'data_hora': ('dataehora', 'data', 'date', 'datalancamento', 'datamovimento'),
+    'valor': ('valorr', 'valor', 'amount', 'quantia'),
+    'creditos': ('creditos', 'credito'),
+    'meio_pagamento': ('meiodepagamento', 'meio', 'conta', 'cartao'),
+    'categoria': ('categoria', 'category'),
+    'descricao': ('descricao', 'historico', 'lancamento', 'memo', 'description', 'titulo', 'title'),
+    'usuario': ('usuario', 'user', 'titular'),
+}
+
+DATE_FORMATS = (
+    DATE_FORMAT, '%d/%m/%Y %H:%M', '%d/%m/%Y', '%d/%m/%y',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d', '%Y%m%d%H%M%S', '%Y%m%d',
+)
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+def statement_kind(file_name):
+    extension = os.path.splitext(file_name or '')[1].lower().lstrip('.')
+    return extension if extension in STATEMENT_KINDS else None
+
+def _fold(text):
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode()
+    return ''.join(char for char in text.lower() if char.isalnum())
+
+def parse_amount(text):
+    """'1.234,56', '-50,00', 'R$ 10', '12.5' -> float; ValueError se inválido"""
+    text = str(text).replace('R$', '').replace(' ', '').strip()
+    if ',' in text and '.' in text:
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.')
+    return float(text)
+
+class DateParser:
+    """Converte datas para o formato da planilha, começando pelo último formato que funcionou"""
+
+    def __init__(self):
+        self._formats = list(DATE_FORMATS)
+
+    def __call__(self, text):
+        text = text.strip()
+        for i, date_format in enumerate(self._formats):
+            try:
+                parsed = datetime.strptime(text, date_format)
+            except ValueError:
+                continue
+            if i:
+                self._formats.insert(0, self._formats.pop(i))
+            return parsed.strftime(DATE_FORMAT)
+        raise ValueError(f"Data inválida: {text}")
+
+def _transaction(data_hora, valor, creditos, descricao, defaults, meio_pagamento='', categoria='', usuario=''):
+    """Transação no formato de parse_expense, ou None para linhas de valor zero"""
+    if creditos > 0:
+        return {'tipo': 'credito', 'valor': creditos, 'data_hora': data_hora}
+    if valor <= 0:
+        return None
+    return {
+        'tipo': 'despesa',
+        'valor': valor,
+        'meio_pagamento': meio_pagamento or defaults['meio_pagamento'],
+        'categoria': categoria or defaults['categoria'],
+        'descricao': descricao,
+        'usuario': usuario or defaults['usuario'],
+        'data_hora': data_hora,
+    }
+
+def iter_csv_transactions(lines, defaults):
+    """
+    Lê o CSV linha a linha e gera (número da linha, transação ou None). Com a
+    coluna Créditos vale a convenção da planilha (Valor é débito); sem ela,
+    valores negativos são débitos e positivos são créditos, como nos extratos.
+    """
+    lines = iter(lines)
+    first_line = next(lines, '')
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+    header = next(csv.reader([first_line], delimiter=delimiter), [])
+
+    folded = [_fold(name) for name in header]
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        index = next((folded.index(alias) for alias in aliases if alias in folded), None)
+        if index is not None:
+            columns[field] = index
+    if 'data_hora' not in columns or 'valor' not in columns:
+        raise ValueError("O CSV precisa das colunas de data e valor")
+
+    sheet_format = 'creditos' in columns
+    parse_date = DateParser()
+
+    def column(row, field):
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ''
+
+    for number, row in enumerate(csv.reader(lines, delimiter=delimiter), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            data_hora = parse_date(column(row, 'data_hora'))
+            valor_text = column(row, 'valor')
+            valor = parse_amount(valor_text) if valor_text else 0.0
+            if sheet_format:
+                creditos_text = column(row, 'creditos')
+                creditos = parse_amount(creditos_text) if creditos_text else 0.0
+            else:
+                valor, creditos = max(-valor, 0.0), max(valor, 0.0)
+        except ValueError:
+            yield number, None
+            continue
+
+        transaction = _transaction(
+            data_hora, valor, creditos, column(row, 'descricao'), defaults,
+            column(row, 'meio_pagamento'), column(row, 'categoria'), column(row, 'usuario')
+        )
+        if transaction:
+            yield number, transaction
+
+def iter_ofx_transactions(lines, defaults):
+    """Gera (número do lançamento, transação ou None) de cada <STMTTRN> do OFX, lendo linha a linha"""
+    parse_date = DateParser()
+    current = None
+    number = 0
+
+    for line in lines:
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN' and not closing:
+                current = {}
+            elif tag == 'STMTTRN' and current is not None:
+                number += 1
+                try:
+                    # DTPOSTED vem como aaaammdd[hhmmss[.xxx]][fuso]
+                    posted = re.match(r'\d{8}(\d{6})?', current.get('DTPOSTED', ''))
+                    data_hora = parse_date(posted.group(0) if posted else '')
+                    amount = parse_amount(current.get('TRNAMT', ''))
+                except ValueError:
+                    current = None
+                    yield number, None
+                    continue
+
+                descricao = current.get('MEMO') or current.get('NAME') or ''
+                transaction = _transaction(data_hora, max(-amount, 0.0), max(amount, 0.0), descricao, defaults)
+                current = None
+                if transaction:
+                    yield number, transaction
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+def open_statement(path):
+    """Abre o extrato como texto; arquivos que não são UTF-8 são lidos como cp1252 (comum nos bancos)"""
+    with open(path, 'rb') as f:
+        sample = f.read(65536)
+    try:
+        sample.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # Um caractere multibyte pode ter sido cortado no fim da amostra
+        encoding = 'utf-8-sig' if e.start >= len(sample) - 3 else 'cp1252'
+    return open(path, encoding=encoding, errors='replace', newline='')
+
+def iter_statement(lines, kind, defaults):
+    if kind == 'ofx':
+        return iter_ofx_transactions(lines, defaults)
+    return iter_csv_transactions(lines, defaults)
+
+def next_chunk(transactions, size):
+    """Até size transações do gerador: (transações válidas, linhas com erro, acabou?)"""
+    chunk, errors = [], []
+    for number, transaction in transactions:
+        if transaction is None:
+            errors.append(number)
+            continue
+        chunk.append(transaction)
+        if len(chunk) >= size:
+            return chunk, errors, False
+    return chunk, errors, True
@@ -5,251 +5,463 @@ from datetime import datetime, timedelta
 import pytz
 import io
 import os
+import time
+import functools
+import hashlib
+import multiprocessing
 from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from .chart_cache import get_chart_cache
+from .aggregates import format_summary
+from .storage import HEADERS
+from .metrics import CHART_SECONDS
+from .render_profiles import RenderProfile, get_render_profile
 
 plt.switch_backend('Agg')
 
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+def _save_plot(fig, profile):
+    if profile.scale != 1.0:
+        fig.set_size_inches(fig.get_size_inches() * profile.scale)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=profile.format, dpi=profile.dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def _plot_gastos_por_pessoa(gastos_usuario):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    gastos_usuario.plot(kind='barh', ax=ax, color='skyblue')
+    
+    ax.set_title('Gastos por Pessoa (Débitos)', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Valor (R$)', fontsize=12)
+    ax.set_ylabel('Usuário', fontsize=12)
+    
+    for i, v in enumerate(gastos_usuario.values):
+        ax.text(v + max(gastos_usuario.values) * 0.01, i, f'R$ {v:.2f}', 
+               verticalalignment='center', fontweight='bold')
+    
+    plt.tight_layout()
+    return fig
+
+def _plot_meio_pagamento(pagamentos):
+    fig, ax = plt.subplots(figsize=(10, 8))
+    colors = plt.cm.Set3(range(len(pagamentos)))
+    
+    wedges, texts, autotexts = ax.pie(pagamentos.values, labels=pagamentos.index, 
+                                     autopct='%1.1f%%', startangle=90, colors=colors)
+    
+    ax.set_title('Meio de Pagamento Mais Usado', fontsize=16, fontweight='bold')
+    
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+    
+    plt.tight_layout()
+    return fig
+
+def _plot_compras_por_categoria(categorias):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    categorias.plot(kind='barh', ax=ax, color='lightcoral')
+    
+    ax.set_title('Número de Compras por Categoria', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Número de Compras', fontsize=12)
+    ax.set_ylabel('Categoria', fontsize=12)
+    
+    for i, v in enumerate(categorias.values):
+        ax.text(v + max(categorias.values) * 0.01, i, str(v), 
+               verticalalignment='center', fontweight='bold')
+    
+    plt.tight_layout()
+    return fig
+
+def _plot_total_gasto_mes(gastos_mes):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    gastos_mes.plot(kind='bar', ax=ax, color='lightgreen')
+    
+    ax.set_title('Total Gasto por Mês', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Mês/Ano', fontsize=12)
+    ax.set_ylabel('Valor (R$)', fontsize=12)
+    ax.tick_params(axis='x', rotation=45)
+    
+    for i, v in enumerate(gastos_mes.values):
+        ax.text(i, v + max(gastos_mes.values) * 0.01, f'R$ {v:.2f}', 
+               horizontalalignment='center', fontweight='bold')
+    
+    plt.tight_layout()
+    return fig
+
+def _plot_gastos_por_dia(gastos_dia):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    gastos_dia.plot(kind='line', ax=ax, marker='o', linewidth=2, markersize=6, color='purple')
+    
+    ax.set_title('Gastos por Dia', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Data', fontsize=12)
+    ax.set_ylabel('Valor (R$)', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    
+    fig.autofmt_xdate()
+    
+    plt.tight_layout()
+    return fig
+
+def _plot_credito_vs_debito(totais):
+    total_creditos, total_debitos = totais
+    
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    categories = ['Créditos', 'Débitos']
+    values = [total_creditos, total_debitos]
+    colors = ['green', 'red']
+    
+    bars = ax.bar(categories, values, color=colors, alpha=0.7)
+    
+    ax.set_title('Comparação: Créditos vs Débitos', fontsize=16, fontweight='bold')
+    ax.set_ylabel('Valor (R$)', fontsize=12)
+    
+    for bar, value in zip(bars, values):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + max(values) * 0.01,
+               f'R$ {value:.2f}', ha='center', va='bottom', fontweight='bold')
+    
+    saldo = total_creditos - total_debitos
+    ax.axhline(y=saldo, color='blue', linestyle='--', alpha=0.7)
+    ax.text(0.5, saldo + max(values) * 0.05, f'Saldo: R$ {saldo:.2f}', 
+           ha='center', va='bottom', fontweight='bold', color='blue')
+    
+    plt.tight_layout()
+    return fig
+
+def _plot_debitos_acumulados(debitos_acumulados):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    debitos_acumulados.plot(kind='line', ax=ax, marker='o', linewidth=2, 
+                           markersize=6, color='red', alpha=0.7)
+    
+    ax.set_title('Débitos Acumulados por Data', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Data', fontsize=12)
+    ax.set_ylabel('Valor Acumulado (R$)', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    
+    ax.fill_between(debitos_acumulados.index, debitos_acumulados.values, 
+                   alpha=0.3, color='red')
+    
+    fig.autofmt_xdate()
+    
+    plt.tight_layout()
+    return fig
+
+CHART_PLOTTERS = {
+    'gastos_por_pessoa': _plot_gastos_por_pessoa,
+    'meio_pagamento': _plot_meio_pagamento,
+    'compras_por_categoria': _plot_compras_por_categoria,
+    'total_gasto_mes': _plot_total_gasto_mes,
+    'gastos_por_dia': _plot_gastos_por_dia,
+    'credito_vs_debito': _plot_credito_vs_debito,
+    'debitos_acumulados': _plot_debitos_acumulados,
+}
+
+def render_chart(chart_key, data, profile=None):
+    """Renderiza um gráfico a partir do seu agregado e retorna os bytes da imagem"""
+    return _save_plot(CHART_PLOTTERS[chart_key](data), profile or get_render_profile())
+
+def chart_digest(chart_key, data, profile=None):
+    """Hash do agregado e do perfil de um gráfico; entradas iguais produzem a mesma imagem"""
+    digest = hashlib.sha256(chart_key.encode())
+    digest.update(repr(profile or get_render_profile()).encode())
+    if isinstance(data, pd.Series):
+        digest.update(str(data.index.dtype).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    else:
+        digest.update(repr(data).encode())
+    return digest.hexdigest()
+
+def _observe_render(chart_key, submitted_at, future):
+    # Medido no processo principal: com CHART_WORKERS > 1 a renderização roda em outro processo
+    CHART_SECONDS.observe(time.perf_counter() - submitted_at, chart=chart_key, stage='render')
+
+def _cache_rendered(cache, digest, future):
+    if not future.cancelled() and future.exception() is None:
+        cache.put(digest, future.result())
+
+_chart_executor = None
+
+def get_chart_executor():
+    """
+    Executor compartilhado de renderização. Com CHART_WORKERS > 1 usa um pool de
+    processos (os gráficos são CPU-bound); senão, uma única thread para não
+    bloquear o event loop.
+    """
+    global _chart_executor
+    if _chart_executor is None:
+        workers = int(os.getenv('CHART_WORKERS', '1'))
+        if workers > 1:
+            _chart_executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        else:
+            _chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charts')
+    return _chart_executor
+
+def _to_cents(column):
+    """Valores da planilha ('50', '50,5', 50.5, '') -> centavos int64; inválidos viram 0"""
+    raw = pd.Series(column, dtype='object')
+    if any(isinstance(value, str) and ',' in value for value in column):
+        raw = raw.astype('string').str.replace(',', '.', regex=False)
+    reais = pd.to_numeric(raw, errors='coerce').fillna(0)
+    return (reais * 100).round().astype('int64')
+
+def _to_datetime(column):
+    # 'dd/mm/aaaa HH:MM:SS' -> ISO antes do parse: o parser ISO do pandas é bem mais rápido que o strptime
+    iso = [f"{value[6:10]}-{value[3:5]}-{value[0:2]}T{value[11:]}" for value in map(str, column)]
+    return pd.to_datetime(pd.Series(iso, dtype='object'), format='ISO8601', errors='coerce')
+
+def _build_frame(columns, size):
+    def column(name):
+        return columns.get(name, [''] * size)
+    
+    return pd.DataFrame({
+        'Data e Hora': _to_datetime(column('Data e Hora')),
+        'Valor (centavos)': _to_cents(column('Valor (R$)')),
+        'Meio de Pagamento': pd.Categorical(column('Meio de Pagamento')),
+        'Categoria': pd.Categorical(column('Categoria')),
+        'Descrição': pd.Series(column('Descrição'), dtype='object'),
+        'Usuário': pd.Categorical(column('Usuário')),
+        'Créditos (centavos)': _to_cents(column('Créditos')),
+    })
+
 class StatisticsGenerator:
-    def __init__(self, data):
-        self.df = pd.DataFrame(data)
-        self.tz = pytz.timezone('America/Sao_Paulo')
+    def __init__(self, data, profile=None):
+        """
+        data pode ser a lista de registros de get_all_data ou um dict
+        {coluna: valores}; use from_values para a matriz de get_all_values.
+        """
+        if isinstance(data, dict):
+            columns = data
+            size = len(next(iter(data.values()), []))
+        else:
+            columns = {header: [record.get(header, '') for record in data] for header in HEADERS}
+            size = len(data)
         
-        if not self.df.empty:
-            self.df['Data e Hora'] = pd.to_datetime(self.df['Data e Hora'], format='%d/%m/%Y %H:%M:%S')
-            
-            self.df['Valor (R$)'] = self.df['Valor (R$)'].astype(str).str.replace(',', '.')
-            self.df['Valor (R$)'] = pd.to_numeric(self.df['Valor (R$)'], errors='coerce').fillna(0)
-            
-            if 'Créditos' in self.df.columns:
-                self.df['Créditos'] = self.df['Créditos'].astype(str).str.replace(',', '.')
-                self.df['Créditos'] = pd.to_numeric(self.df['Créditos'], errors='coerce').fillna(0)
-            else:
-                self.df['Créditos'] = 0
-            
-            self.df['Data'] = self.df['Data e Hora'].dt.date
-            
-            self.debitos = self.df[self.df['Valor (R$)'] > 0].copy()
-            self.creditos = self.df[self.df['Créditos'] > 0].copy()
+        self.df = _build_frame(columns, size)
+        self.tz = pytz.timezone('America/Sao_Paulo')
+        self.profile = profile if isinstance(profile, RenderProfile) else get_render_profile(profile)
+        self._update_masks()
     
-    def _save_plot(self, fig, filename):
-        buffer = io.BytesIO()
-        fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        plt.close(fig)
-        return buffer
+    def _update_masks(self):
+        self._aggregates = {}
+        # Máscaras em vez de cópias do DataFrame para débitos e créditos
+        self.debito_mask = (self.df['Valor (centavos)'] > 0).to_numpy()
+        self.credito_mask = (self.df['Créditos (centavos)'] > 0).to_numpy()
     
-    def gastos_por_pessoa(self):
-        if self.debitos.empty:
+    @classmethod
+    def from_values(cls, values, profile=None, report_filter=None):
+        """Monta as colunas direto da matriz de get_all_values (cabeçalho na primeira linha)"""
+        if not values:
+            return cls({}, profile)
+        header, rows = values[0], values[1:]
+        transposed = list(zip(*rows)) if rows else [()] * len(header)
+        columns = {name: transposed[i] for i, name in enumerate(header) if i < len(transposed)}
+        stats_gen = cls(columns, profile)
+        if report_filter:
+            stats_gen.apply_filter(report_filter)
+        return stats_gen
+    
+    def apply_filter(self, report_filter):
+        """
+        Restringe o DataFrame ao ReportFilter. O período é recortado por busca
+        binária no índice de datas (ordenado só se a planilha não estiver em ordem).
+        """
+        df = self.df
+        if report_filter.start is not None:
+            df = df[df['Data e Hora'].notna()]
+            dates = pd.DatetimeIndex(df['Data e Hora'])
+            if not dates.is_monotonic_increasing:
+                df = df.sort_values('Data e Hora', kind='stable')
+                dates = pd.DatetimeIndex(df['Data e Hora'])
+            first = dates.searchsorted(pd.Timestamp(report_filter.start), side='left')
+            last = dates.searchsorted(pd.Timestamp(report_filter.end), side='right')
+            df = df.iloc[first:last]
+        if report_filter.usuario:
+            df = df[df['Usuário'] == report_filter.usuario]
+        if report_filter.categoria:
+            df = df[df['Categoria'] == report_filter.categoria]
+        
+        df = df.reset_index(drop=True)
+        for name in ('Meio de Pagamento', 'Categoria', 'Usuário'):
+            df[name] = df[name].cat.remove_unused_categories()
+        self.df = df
+        self._update_masks()
+    
+    @property
+    def debitos(self):
+        return self.df[self.debito_mask]
+    
+    @property
+    def creditos(self):
+        return self.df[self.credito_mask]
+    
+    def _debit_column(self, name):
+        column = self.df[name][self.debito_mask]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.cat.remove_unused_categories()
+        return column
+    
+    def _debit_reais(self):
+        return (self.df['Valor (centavos)'][self.debito_mask] / 100).rename('Valor (R$)')
+    
+    def _render(self, chart_key):
+        data = self.chart_data(chart_key)
+        if data is None:
             return None
-            
-        gastos_usuario = self.debitos.groupby('Usuário')['Valor (R$)'].sum().sort_values(ascending=True)
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        gastos_usuario.plot(kind='barh', ax=ax, color='skyblue')
-        
-        ax.set_title('Gastos por Pessoa (Débitos)', fontsize=16, fontweight='bold')
-        ax.set_xlabel('Valor (R$)', fontsize=12)
-        ax.set_ylabel('Usuário', fontsize=12)
         
-        for i, v in enumerate(gastos_usuario.values):
-            ax.text(v + max(gastos_usuario.values) * 0.01, i, f'R$ {v:.2f}', 
-                   verticalalignment='center', fontweight='bold')
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'gastos_por_pessoa.png')
+        cache = get_chart_cache()
+        digest = chart_digest(chart_key, data, self.profile)
+        png = cache.get(digest)
+        if png is None:
+            with CHART_SECONDS.time(chart=chart_key, stage='render'):
+                png = render_chart(chart_key, data, self.profile)
+            cache.put(digest, png)
+        return io.BytesIO(png)
     
-    def meio_pagamento_mais_usado(self):
-        if self.debitos.empty:
+    def _gastos_por_pessoa_data(self):
+        if not self.debito_mask.any():
             return None
-            
-        pagamentos = self.debitos['Meio de Pagamento'].value_counts()
-        
-        fig, ax = plt.subplots(figsize=(10, 8))
-        colors = plt.cm.Set3(range(len(pagamentos)))
-        
-        wedges, texts, autotexts = ax.pie(pagamentos.values, labels=pagamentos.index, 
-                                         autopct='%1.1f%%', startangle=90, colors=colors)
-        
-        ax.set_title('Meio de Pagamento Mais Usado', fontsize=16, fontweight='bold')
-        
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'meio_pagamento.png')
+        usuarios = self._debit_column('Usuário')
+        return self._debit_reais().groupby(usuarios, observed=True).sum().sort_values(ascending=True)
     
-    def compras_por_categoria(self):
-        if self.debitos.empty:
+    def _meio_pagamento_data(self):
+        if not self.debito_mask.any():
             return None
-            
-        categorias = self.debitos['Categoria'].value_counts().sort_values(ascending=True)
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        categorias.plot(kind='barh', ax=ax, color='lightcoral')
-        
-        ax.set_title('Número de Compras por Categoria', fontsize=16, fontweight='bold')
-        ax.set_xlabel('Número de Compras', fontsize=12)
-        ax.set_ylabel('Categoria', fontsize=12)
-        
-        for i, v in enumerate(categorias.values):
-            ax.text(v + max(categorias.values) * 0.01, i, str(v), 
-                   verticalalignment='center', fontweight='bold')
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'compras_por_categoria.png')
+        return self._debit_column('Meio de Pagamento').value_counts()
     
-    def total_gasto_mes(self):
-        if self.debitos.empty:
+    def _compras_por_categoria_data(self):
+        if not self.debito_mask.any():
             return None
-            
-        self.debitos['Mes_Ano'] = self.debitos['Data e Hora'].dt.to_period('M')
-        gastos_mes = self.debitos.groupby('Mes_Ano')['Valor (R$)'].sum()
-        
-        fig, ax = plt.subplots(figsize=(12, 6))
-        gastos_mes.plot(kind='bar', ax=ax, color='lightgreen')
-        
-        ax.set_title('Total Gasto por Mês', fontsize=16, fontweight='bold')
-        ax.set_xlabel('Mês/Ano', fontsize=12)
-        ax.set_ylabel('Valor (R$)', fontsize=12)
-        ax.tick_params(axis='x', rotation=45)
-        
-        for i, v in enumerate(gastos_mes.values):
-            ax.text(i, v + max(gastos_mes.values) * 0.01, f'R$ {v:.2f}', 
-                   horizontalalignment='center', fontweight='bold')
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'total_gasto_mes.png')
+        return self._debit_column('Categoria').value_counts().sort_values(ascending=True)
     
-    def gastos_por_dia(self):
-        if self.debitos.empty:
+    def _total_gasto_mes_data(self):
+        if not self.debito_mask.any():
             return None
-            
-        gastos_dia = self.debitos.groupby('Data')['Valor (R$)'].sum().sort_index()
-        
-        fig, ax = plt.subplots(figsize=(12, 6))
-        gastos_dia.plot(kind='line', ax=ax, marker='o', linewidth=2, markersize=6, color='purple')
-        
-        ax.set_title('Gastos por Dia', fontsize=16, fontweight='bold')
-        ax.set_xlabel('Data', fontsize=12)
-        ax.set_ylabel('Valor (R$)', fontsize=12)
-        ax.grid(True, alpha=0.3)
-        
-        fig.autofmt_xdate()
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'gastos_por_dia.png')
+        mes_ano = self._debit_column('Data e Hora').dt.to_period('M').rename('Mes_Ano')
+        return self._debit_reais().groupby(mes_ano).sum()
     
-    def credito_vs_debito(self):
-        total_creditos = self.df['Créditos'].sum()
-        total_debitos = self.df['Valor (R$)'].sum()
+    def _debitos_por_dia(self):
+        dia = self._debit_column('Data e Hora').dt.normalize().rename('Data')
+        return self._debit_reais().groupby(dia).sum().sort_index()
+    
+    def _gastos_por_dia_data(self):
+        if not self.debito_mask.any():
+            return None
+        return self._debitos_por_dia()
+    
+    def _credito_vs_debito_data(self):
+        total_creditos = int(self.df['Créditos (centavos)'].sum()) / 100
+        total_debitos = int(self.df['Valor (centavos)'].sum()) / 100
         
         if total_creditos == 0 and total_debitos == 0:
             return None
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        categories = ['Créditos', 'Débitos']
-        values = [total_creditos, total_debitos]
-        colors = ['green', 'red']
-        
-        bars = ax.bar(categories, values, color=colors, alpha=0.7)
-        
-        ax.set_title('Comparação: Créditos vs Débitos', fontsize=16, fontweight='bold')
-        ax.set_ylabel('Valor (R$)', fontsize=12)
-        
-        for bar, value in zip(bars, values):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + max(values) * 0.01,
-                   f'R$ {value:.2f}', ha='center', va='bottom', fontweight='bold')
-        
-        saldo = total_creditos - total_debitos
-        ax.axhline(y=saldo, color='blue', linestyle='--', alpha=0.7)
-        ax.text(0.5, saldo + max(values) * 0.05, f'Saldo: R$ {saldo:.2f}', 
-               ha='center', va='bottom', fontweight='bold', color='blue')
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'credito_vs_debito.png')
+        return (total_creditos, total_debitos)
     
-    def debitos_acumulados(self):
-        if self.debitos.empty:
+    def _debitos_acumulados_data(self):
+        if not self.debito_mask.any():
             return None
-        
-        debitos_por_dia = self.debitos.groupby('Data')['Valor (R$)'].sum().sort_index()
-        
-        debitos_acumulados = debitos_por_dia.cumsum()
-        
-        fig, ax = plt.subplots(figsize=(12, 6))
-        debitos_acumulados.plot(kind='line', ax=ax, marker='o', linewidth=2, 
-                               markersize=6, color='red', alpha=0.7)
-        
-        ax.set_title('Débitos Acumulados por Data', fontsize=16, fontweight='bold')
-        ax.set_xlabel('Data', fontsize=12)
-        ax.set_ylabel('Valor Acumulado (R$)', fontsize=12)
-        ax.grid(True, alpha=0.3)
-        
-        ax.fill_between(debitos_acumulados.index, debitos_acumulados.values, 
-                       alpha=0.3, color='red')
-        
-        fig.autofmt_xdate()
-        
-        plt.tight_layout()
-        return self._save_plot(fig, 'debitos_acumulados.png')
+        return self._debitos_por_dia().cumsum()
     
-    def generate_all_statistics(self):
-        stats = {}
-        
-        stats['gastos_por_pessoa'] = self.gastos_por_pessoa()
-        stats['meio_pagamento'] = self.meio_pagamento_mais_usado()
-        stats['compras_por_categoria'] = self.compras_por_categoria()
-        stats['total_gasto_mes'] = self.total_gasto_mes()
-        stats['gastos_por_dia'] = self.gastos_por_dia()
-        stats['credito_vs_debito'] = self.credito_vs_debito()
-        stats['debitos_acumulados'] = self.debitos_acumulados()
-        
-        return {k: v for k, v in stats.items() if v is not None}
+    def chart_data(self, chart_key):
+        """Agregado (Series ou tupla, serializável) usado para desenhar o gráfico"""
+        if self.df.empty:
+            return None
+        if chart_key not in self._aggregates:
+            with CHART_SECONDS.time(chart=chart_key, stage='data'):
+                self._aggregates[chart_key] = getattr(self, f'_{chart_key}_data')()
+        return self._aggregates[chart_key]
+    
+    def chart_digests(self):
+        """{chave: hash do agregado} dos gráficos que têm dados"""
+        digests = {}
+        for chart_key in CHART_PLOTTERS:
+            data = self.chart_data(chart_key)
+            if data is not None:
+                digests[chart_key] = chart_digest(chart_key, data, self.profile)
+        return digests
+    
+    def gastos_por_pessoa(self):
+        return self._render('gastos_por_pessoa')
+    
+    def meio_pagamento_mais_usado(self):
+        return self._render('meio_pagamento')
+    
+    def compras_por_categoria(self):
+        return self._render('compras_por_categoria')
+    
+    def total_gasto_mes(self):
+        return self._render('total_gasto_mes')
+    
+    def gastos_por_dia(self):
+        return self._render('gastos_por_dia')
+    
+    def credito_vs_debito(self):
+        return self._render('credito_vs_debito')
+    
+    def debitos_acumulados(self):
+        return self._render('debitos_acumulados')
+    
+    def submit_charts(self, chart_keys=None, executor=None):
+        """
+        Submete a renderização de cada gráfico ao executor e retorna {chave: Future}
+        com os bytes do PNG. Só o agregado de cada gráfico é enviado ao worker.
+        """
+        executor = executor or get_chart_executor()
+        cache = get_chart_cache()
+        futures = {}
+        for chart_key in CHART_PLOTTERS if chart_keys is None else chart_keys:
+            data = self.chart_data(chart_key)
+            if data is None:
+                continue
+            
+            digest = chart_digest(chart_key, data, self.profile)
+            png = cache.get(digest)
+            if png is not None:
+                future = Future()
+                future.set_result(png)
+            else:
+                future = executor.submit(render_chart, chart_key, data, self.profile)
+                future.add_done_callback(lambda f, d=digest: _cache_rendered(cache, d, f))
+                future.add_done_callback(functools.partial(_observe_render, chart_key, time.perf_counter()))
+            futures[chart_key] = future
+        return futures
+    
+    def generate_all_statistics(self, executor=None):
+        futures = self.submit_charts(executor=executor)
+        return {k: io.BytesIO(f.result()) for k, f in futures.items()}
     
     def get_summary_text(self):
         if self.df.empty:
             return "Nenhum dado encontrado para gerar estatísticas."
         
-        total_creditos = self.df['Créditos'].sum()
-        total_debitos = self.df['Valor (R$)'].sum()
-        saldo = total_creditos - total_debitos
+        total_creditos = int(self.df['Créditos (centavos)'].sum()) / 100
+        total_debitos = int(self.df['Valor (centavos)'].sum()) / 100
         
         total_transacoes = len(self.df)
-        num_creditos = len(self.creditos)
-        num_debitos = len(self.debitos)
+        num_creditos = int(self.credito_mask.sum())
+        num_debitos = int(self.debito_mask.sum())
         
         data_inicio = self.df['Data e Hora'].min().strftime('%d/%m/%Y')
         data_fim = self.df['Data e Hora'].max().strftime('%d/%m/%Y')
         
-        if not self.debitos.empty:
-            gastos_usuario = self.debitos.groupby('Usuário')['Valor (R$)'].sum()
+        if num_debitos:
+            gastos_usuario = self._gastos_por_pessoa_data().sort_index()
             maior_gastador = gastos_usuario.idxmax()
             valor_maior_gastador = gastos_usuario.max()
+            categoria_freq = self._debit_column('Categoria').mode()[0]
         else:
             maior_gastador = "N/A"
             valor_maior_gastador = 0
-        
-        if not self.debitos.empty:
-            categoria_freq = self.debitos['Categoria'].mode()[0]
-        else:
             categoria_freq = "N/A"
         
-        summary = f"""📊 **RESUMO FINANCEIRO**
-        
-💰 **Total de créditos**: R$ {total_creditos:.2f} ({num_creditos} transações)
-💸 **Total de débitos**: R$ {total_debitos:.2f} ({num_debitos} transações)
-💳 **Saldo atual**: R$ {saldo:.2f}
-📊 **Total de transações**: {total_transacoes}
-📅 **Período**: {data_inicio} a {data_fim}
-
-👤 **Maior gastador**: {maior_gastador} (R$ {valor_maior_gastador:.2f})
-🏷️ **Categoria mais frequente**: {categoria_freq}
-"""
-        
-        return summary 
\ No newline at end of file
+        return format_summary(
+            total_creditos, num_creditos, total_debitos, num_debitos, total_transacoes,
+            data_inicio, data_fim, maior_gastador, valor_maior_gastador, categoria_freq
+        )
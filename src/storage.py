@@ -0,0 +1,407 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+import pytz
+from .report_filters import sortable_range, row_matches
+
+HEADERS = [
+    'Data e Hora', 'Valor (R$)', 'Meio de Pagamento',
+    'Categoria', 'Descrição', 'Usuário', 'Créditos'
+]
+
+DATE_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+def sortable_date(data_hora):
+    # 'dd/mm/aaaa HH:MM:SS' -> 'aaaa-mm-dd HH:MM:SS', comparável como texto
+    data_hora = str(data_hora)
+    if len(data_hora) < 10 or data_hora[2] != '/' or data_hora[5] != '/':
+        return None
+    return f"{data_hora[6:10]}-{data_hora[3:5]}-{data_hora[0:2]}{data_hora[10:]}"
+
+def _done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+class StorageBackend:
+    """
+    Interface comum aos backends do livro-caixa. As escritas retornam um Future
+    que recebe True/False quando a linha estiver gravada na fonte da verdade.
+    """
+
+    name = 'base'
+    # True quando as escritas ficam em um diário local até a fonte da verdade confirmar
+    journaled = False
+
+    def __init__(self):
+        self.tz = pytz.timezone('America/Sao_Paulo')
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Registra um objeto com add_rows(rows) e reset(), avisado a cada escrita/limpeza confirmada"""
+        self._listeners.append(listener)
+
+    def _notify_rows(self, rows):
+        for listener in self._listeners:
+            listener.add_rows(rows)
+
+    def _notify_reset(self):
+        for listener in self._listeners:
+            listener.reset()
+
+    def _normalize_text(self, text):
+        return text.lower().replace(' ', '')
+
+    def _now(self):
+        return datetime.now(self.tz).strftime(DATE_FORMAT)
+
+    def build_expense_row(self, valor, meio_pagamento, categoria, descricao, usuario, data_hora=None):
+        meio_pagamento = self._normalize_text(meio_pagamento)
+        categoria = self._normalize_text(categoria)
+        usuario = self._normalize_text(usuario)
+        return [data_hora or self._now(), valor, meio_pagamento, categoria, descricao, usuario, '']
+
+    def build_credit_row(self, valor, data_hora=None):
+        return [data_hora or self._now(), '', '', '', '', '', valor]
+
+    def add_expense(self, valor, meio_pagamento, categoria, descricao, usuario, entry_id=None):
+        row = self.build_expense_row(valor, meio_pagamento, categoria, descricao, usuario)
+        return self.add_rows([row], entry_id)
+
+    def add_credit(self, valor, entry_id=None):
+        return self.add_rows([self.build_credit_row(valor)], entry_id)
+
+    def add_transactions(self, transactions, entry_id=None):
+        """
+        Várias transações (no formato de parse_expense, com data_hora opcional)
+        gravadas em uma única chamada a add_rows
+        """
+        rows = []
+        for data in transactions:
+            if data['tipo'] == 'credito':
+                rows.append(self.build_credit_row(data['valor'], data.get('data_hora')))
+            else:
+                rows.append(self.build_expense_row(
+                    data['valor'], data['meio_pagamento'], data['categoria'],
+                    data['descricao'], data['usuario'], data.get('data_hora')
+                ))
+        return self.add_rows(rows, entry_id)
+
+    def add_rows(self, rows, entry_id=None):
+        """entry_id identifica a origem das linhas (ex.: a update do Telegram) para descartar repetições"""
+        raise NotImplementedError
+
+    def clear_table(self, archive=False):
+        raise NotImplementedError
+
+    def get_all_data(self):
+        raise NotImplementedError
+
+    def get_all_values(self):
+        raise NotImplementedError
+
+    def get_filtered_values(self, report_filter):
+        """
+        Linhas (com cabeçalho) que podem estar no ReportFilter. Os backends
+        empurram o filtro o quanto conseguem; o resultado pode trazer linhas a
+        mais, nunca a menos.
+        """
+        values = self.get_all_values()
+        if not values:
+            return values
+        rows = values[1:]
+        if report_filter.start is not None:
+            start, end = sortable_range(report_filter)
+            rows = [row for row in rows if start <= (sortable_date(row[0]) or '') <= end]
+        return values[:1] + [row for row in rows if row_matches(row, report_filter)]
+
+    def estimated_wait(self, kind):
+        """Segundos que uma leitura ('read') ou escrita ('write') feita agora esperaria por cota da API"""
+        return 0.0
+
+    def status(self):
+        return {'backend': self.name}
+
+    def close(self):
+        pass
+
+def _parse_amount(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        return None
+
+def _format_amount(value):
+    return '' if value is None else value
+
+class SQLiteStorage(StorageBackend):
+    """
+    Livro-caixa local em SQLite, fonte da verdade de todas as escritas. As linhas
+    novas ficam marcadas como não replicadas até o SheetsReplicator espelhá-las
+    na planilha.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        super().__init__()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS transacoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data_hora TEXT NOT NULL,
+                valor REAL,
+                meio_pagamento TEXT,
+                categoria TEXT,
+                descricao TEXT,
+                usuario TEXT,
+                creditos REAL,
+                replicado INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_transacoes_data ON transacoes (data_hora);
+            CREATE INDEX IF NOT EXISTS idx_transacoes_usuario ON transacoes (usuario);
+            CREATE INDEX IF NOT EXISTS idx_transacoes_categoria ON transacoes (categoria);
+            CREATE INDEX IF NOT EXISTS idx_transacoes_meio ON transacoes (meio_pagamento);
+            CREATE INDEX IF NOT EXISTS idx_transacoes_pendentes ON transacoes (id) WHERE replicado = 0;
+        ''')
+        self.conn.commit()
+
+        self.replicator = None
+
+    @staticmethod
+    def _to_db(row, replicado):
+        data_hora = datetime.strptime(row[0], DATE_FORMAT).strftime('%Y-%m-%d %H:%M:%S')
+        row = list(row) + [''] * (len(HEADERS) - len(row))
+        return (
+            data_hora, _parse_amount(row[1]), row[2] or None, row[3] or None,
+            row[4] or None, row[5] or None, _parse_amount(row[6]), replicado
+        )
+
+    @staticmethod
+    def _to_sheet(db_row):
+        data_hora, valor, meio, categoria, descricao, usuario, creditos = db_row
+        return [
+            datetime.strptime(data_hora, '%Y-%m-%d %H:%M:%S').strftime(DATE_FORMAT),
+            _format_amount(valor), meio or '', categoria or '',
+            descricao or '', usuario or '', _format_amount(creditos)
+        ]
+
+    def _insert(self, rows, replicado):
+        with self._lock:
+            self.conn.executemany(
+                'INSERT INTO transacoes (data_hora, valor, meio_pagamento, categoria, '
+                'descricao, usuario, creditos, replicado) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [self._to_db(row, replicado) for row in rows]
+            )
+            self.conn.commit()
+
+    def add_rows(self, rows, entry_id=None):
+        try:
+            self._insert(rows, replicado=0)
+        except Exception as e:
+            print(f"Erro ao gravar no livro-caixa local: {e}")
+            return _done_future(False)
+
+        self._notify_rows(rows)
+        if self.replicator:
+            self.replicator.notify()
+        return _done_future(True)
+
+    def import_rows(self, rows):
+        """Importa linhas que já estão na planilha (não precisam ser replicadas)"""
+        valid = []
+        for row in rows:
+            try:
+                self._to_db(row, replicado=1)
+            except (ValueError, IndexError):
+                continue
+            valid.append(row)
+        self._insert(valid, replicado=1)
+        return len(valid)
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM transacoes').fetchone()[0]
+
+    def pending_replication(self, limit):
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT id, data_hora, valor, meio_pagamento, categoria, descricao, usuario, creditos '
+                'FROM transacoes WHERE replicado = 0 ORDER BY id LIMIT ?', (limit,)
+            ).fetchall()
+        return [row[0] for row in rows], [self._to_sheet(row[1:]) for row in rows]
+
+    def mark_replicated(self, ids):
+        with self._lock:
+            self.conn.executemany('UPDATE transacoes SET replicado = 1 WHERE id = ?', [(i,) for i in ids])
+            self.conn.commit()
+
+    def _select_rows(self, where='', params=()):
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT data_hora, valor, meio_pagamento, categoria, descricao, usuario, creditos '
+                f'FROM transacoes{where} ORDER BY data_hora, id', params
+            ).fetchall()
+        return [self._to_sheet(row) for row in rows]
+
+    def get_all_values(self):
+        return [list(HEADERS)] + self._select_rows()
+
+    def get_filtered_values(self, report_filter):
+        conditions, params = [], []
+        if report_filter.start is not None:
+            conditions.append('data_hora BETWEEN ? AND ?')
+            params.extend(sortable_range(report_filter))
+        if report_filter.usuario:
+            conditions.append('usuario = ?')
+            params.append(report_filter.usuario)
+        if report_filter.categoria:
+            conditions.append('categoria = ?')
+            params.append(report_filter.categoria)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        return [list(HEADERS)] + self._select_rows(where, params)
+
+    def get_all_data(self):
+        try:
+            return [dict(zip(HEADERS, row)) for row in self._select_rows()]
+        except Exception as e:
+            print(f"Erro ao obter dados: {e}")
+            return []
+
+    def clear_table(self, archive=False):
+        if self.replicator:
+            return self.replicator.clear(archive)
+        if archive:
+            print("Arquivamento indisponível sem a replicação para a planilha")
+            return False
+        return self._clear_local()
+
+    def _clear_local(self):
+        try:
+            with self._lock:
+                self.conn.execute('DELETE FROM transacoes')
+                self.conn.commit()
+            self._notify_reset()
+            return True
+        except Exception as e:
+            print(f"Erro ao limpar livro-caixa local: {e}")
+            return False
+
+    def status(self):
+        with self._lock:
+            pending = self.conn.execute('SELECT COUNT(*) FROM transacoes WHERE replicado = 0').fetchone()[0]
+        return {'backend': self.name, 'pending_replication': pending}
+
+    def close(self):
+        if self.replicator:
+            self.replicator.stop()
+        with self._lock:
+            self.conn.close()
+
+class SheetsReplicator:
+    """
+    Espelha em segundo plano as linhas não replicadas do SQLite na planilha,
+    em lotes com append_rows e na ordem de inserção.
+    """
+
+    def __init__(self, storage, sheets_manager, batch_size=200, interval=5.0, max_backoff=300.0):
+        self.storage = storage
+        self.sheets_manager = sheets_manager
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='sheets-replicator', daemon=True)
+
+    def bootstrap(self):
+        """Popula um livro-caixa local vazio com o histórico que já está na planilha"""
+        if self.storage.count() > 0:
+            return 0
+        values = self.sheets_manager.get_all_values()
+        return self.storage.import_rows(values[1:])
+
+    def start(self):
+        self.storage.replicator = self
+        self._thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def replicate_pending(self):
+        with self._lock:
+            return self._replicate_pending()
+
+    def _replicate_pending(self):
+        # Chamar com _lock
+        while True:
+            ids, rows = self.storage.pending_replication(self.batch_size)
+            if not rows:
+                return True
+            self.sheets_manager.append_rows(rows)
+            self.storage.mark_replicated(ids)
+
+    def _run(self):
+        backoff = self.interval
+        while not self._stopped:
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            try:
+                self.replicate_pending()
+                backoff = self.interval
+            except Exception as e:
+                backoff = min(backoff * 2, self.max_backoff)
+                print(f"Erro ao replicar para a planilha (nova tentativa em {backoff:.0f}s): {e}")
+
+    def clear(self, archive=False):
+        # Segura a replicação para nenhuma linha ser espelhada no meio da limpeza
+        with self._lock:
+            # Linhas ainda não espelhadas vão para a planilha antes: senão não
+            # entrariam no arquivo e o DELETE local apagaria a única cópia
+            try:
+                self._replicate_pending()
+            except Exception as e:
+                print(f"Erro ao replicar linhas pendentes antes de limpar, limpeza cancelada: {e}")
+                return False
+            if not self.sheets_manager.clear_table(archive):
+                return False
+            return self.storage._clear_local()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        try:
+            self.replicate_pending()
+        except Exception as e:
+            print(f"Erro ao replicar linhas pendentes no encerramento: {e}")
+        self.sheets_manager.close()
+
+def create_storage(sheets_manager, db_path=None):
+    """Escolhe o backend pelo STORAGE_BACKEND (sheets ou sqlite)"""
+    backend = os.getenv('STORAGE_BACKEND', 'sheets').lower()
+    if backend != 'sqlite':
+        return sheets_manager
+
+    storage = SQLiteStorage(db_path or os.getenv('SQLITE_DB_PATH', 'data/ledger.db'))
+    replicator = SheetsReplicator(
+        storage, sheets_manager,
+        batch_size=int(os.getenv('REPLICATION_BATCH_SIZE', '200')),
+        interval=float(os.getenv('REPLICATION_INTERVAL', '5'))
+    )
+    replicator.bootstrap()
+    replicator.start()
+    return storage
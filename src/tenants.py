@@ -0,0 +1,241 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Livro-caixa de um tenant: planilha, aba, banco local (STORAGE_BACKEND=sqlite) e diário local
+TenantRoute = namedtuple('TenantRoute', ['sheet_id', 'sheet_name', 'db_path', 'journal_path', 'create_worksheet'])
+
+def _default_db_path():
+    return os.getenv('SQLITE_DB_PATH', 'data/ledger.db')
+
+def _default_journal_path():
+    # JOURNAL_PATH vazio desliga o diário
+    return os.getenv('JOURNAL_PATH', 'data/journal.jsonl') or None
+
+def _tenant_path(default_path, sheet_id, sheet_name):
+    """Arquivo do tenant ao lado do padrão: data/ledger.db -> data/ledger-<planilha>-<aba>.db"""
+    if not default_path:
+        return None
+    base, extension = os.path.splitext(default_path)
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', f"{sheet_id}-{sheet_name}").strip('-')
+    return f"{base}-{slug}{extension}"
+
+def default_route():
+    return TenantRoute(
+        os.getenv('GOOGLE_SHEET_ID'), os.getenv('GOOGLE_SHEET_NAME'),
+        _default_db_path(), _default_journal_path(), False
+    )
+
+def _route(sheet_id, sheet_name, create_worksheet=False):
+    return TenantRoute(
+        sheet_id, sheet_name,
+        _tenant_path(_default_db_path(), sheet_id, sheet_name),
+        _tenant_path(_default_journal_path(), sheet_id, sheet_name),
+        create_worksheet
+    )
+
+class TenantRouter:
+    """
+    Decide o livro-caixa de cada chat: primeiro o TENANTS_FILE; depois, com
+    mode='worksheet', uma aba própria do chat na planilha padrão (criada no
+    primeiro uso); senão a planilha padrão, como no modo de uma família só.
+    """
+
+    def __init__(self, routes=None, mode='single'):
+        self.routes = routes or {}
+        self.mode = mode
+        self.default = default_route()
+        self.default_sheet_id = self.default.sheet_id
+        self.default_sheet_name = self.default.sheet_name
+
+    @property
+    def multi_tenant(self):
+        return bool(self.routes) or self.mode == 'worksheet'
+
+    def route(self, chat_id):
+        if chat_id is None:
+            return self.default
+        route = self.routes.get(str(chat_id))
+        if route is not None:
+            return route
+        if self.mode == 'worksheet':
+            return _route(self.default_sheet_id, f"{self.default_sheet_name} {chat_id}", create_worksheet=True)
+        return self.default
+
+def load_tenants(path):
+    """
+    Lê o TENANTS_FILE: um JSON de chat_id para sheet_id/sheet_name (e db_path
+    opcional). Campos ausentes usam GOOGLE_SHEET_ID/GOOGLE_SHEET_NAME.
+    Exemplo: {"-1001234567890": {"sheet_id": "...", "sheet_name": "Silva"}}
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    default = default_route()
+    routes = {}
+    for chat_id, tenant in config.items():
+        sheet_id = tenant.get('sheet_id') or default.sheet_id
+        sheet_name = tenant.get('sheet_name') or default.sheet_name
+        if (sheet_id, sheet_name) == (default.sheet_id, default.sheet_name):
+            route = default
+        else:
+            route = _route(sheet_id, sheet_name)
+        if tenant.get('db_path'):
+            route = route._replace(db_path=tenant['db_path'])
+        routes[str(chat_id)] = route
+    return routes
+
+class TenantCache:
+    """
+    LRU de FinanceBotManager por livro-caixa; chats que apontam para a mesma
+    aba dividem o manager. Os managers ociosos há idle_timeout segundos, ou os
+    menos usados além de max_tenants, são fechados por uma thread de limpeza
+    (gravando o que estiver pendente). Um manager com chamadas em andamento ou
+    usado há menos de min_idle segundos nunca sai, e a rota padrão fica sempre.
+    """
+
+    def __init__(self, factory, router, max_tenants=50, idle_timeout=900, min_idle=30,
+                 rate_per_minute=20, burst=10, sweep_interval=60):
+        self.factory = factory
+        self.router = router
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self.min_idle = min_idle
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+
+        # rota -> [manager, último uso]; o fim do OrderedDict é o mais recente
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.evicted = 0
+
+        self._thread = threading.Thread(target=self._run, name='tenant-sweeper', daemon=True)
+        self._thread.start()
+
+    def _rate_limiter(self):
+        # Com uma família só a cota inteira da conta de serviço é dela
+        if not self.router.multi_tenant or not self.rate_per_minute:
+            return None
+        return TokenBucket(self.rate_per_minute / 60, self.burst)
+
+    def cached(self, chat_id=None):
+        """O manager do chat se já estiver no cache (sem bloquear), ou None"""
+        route = self.router.route(chat_id)
+        with self._lock:
+            entry = self._entries.get(route)
+            if entry is None:
+                return None
+            entry[1] = time.monotonic()
+            self._entries.move_to_end(route)
+            return entry[0]
+
+    def get(self, chat_id=None):
+        """O manager do chat, criando-o se preciso; pode bloquear (use fora do event loop)"""
+        manager = self.cached(chat_id)
+        if manager is not None:
+            return manager
+
+        route = self.router.route(chat_id)
+        with self._lock:
+            build_lock = self._building.setdefault(route, threading.Lock())
+        # Um lock por rota: criar o manager de um chat não segura os outros
+        with build_lock:
+            manager = self.cached(chat_id)
+            if manager is not None:
+                return manager
+            manager = self.factory(route, self._rate_limiter())
+            with self._lock:
+                self._entries[route] = [manager, time.monotonic()]
+                self._building.pop(route, None)
+                over_capacity = len(self._entries) > self.max_tenants
+
+        if over_capacity:
+            self._wakeup.set()
+        return manager
+
+    def is_built(self, chat_id=None):
+        with self._lock:
+            return self.router.route(chat_id) in self._entries
+
+    def managers(self):
+        with self._lock:
+            return [entry[0] for entry in self._entries.values()]
+
+    def _collect_evictions(self):
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            # Do menos para o mais recentemente usado
+            for route, (manager, last_used) in list(self._entries.items()):
+                if route == self.router.default or manager.sheets.busy():
+                    continue
+                idle = now - max(last_used, manager.sheets.last_activity)
+                over_capacity = len(self._entries) > self.max_tenants
+                if idle >= self.idle_timeout or (over_capacity and idle >= self.min_idle):
+                    del self._entries[route]
+                    evicted.append((route, manager))
+            self.evicted += len(evicted)
+        return evicted
+
+    def sweep(self):
+        for route, manager in self._collect_evictions():
+            logger.info(f"Livro-caixa {route.sheet_name} ocioso, liberando da memória")
+            try:
+                manager.close()
+            except Exception as e:
+                logger.error(f"Erro ao fechar o livro-caixa {route.sheet_name}: {e}")
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.sweep_interval)
+            self._wakeup.clear()
+            if not self._closed:
+                self.sweep()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'multi_tenant': self.router.multi_tenant,
+                'cached': len(self._entries),
+                'max_tenants': self.max_tenants,
+                'evicted': self.evicted,
+            }
+
+    def close(self):
+        """Fecha todos os managers, gravando as linhas pendentes"""
+        self._closed = True
+        self._wakeup.set()
+        with self._lock:
+            entries = [(route, entry[0]) for route, entry in self._entries.items()]
+            self._entries.clear()
+        for route, manager in entries:
+            try:
+                manager.close()
+            except Exception as e:
+                logger.error(f"Erro ao fechar o livro-caixa {route.sheet_name}: {e}")
+
+def create_tenant_cache(factory):
+    """TenantCache configurado pelo ambiente (TENANTS_FILE, TENANT_MODE e limites)"""
+    tenants_file = os.getenv('TENANTS_FILE')
+    router = TenantRouter(
+        routes=load_tenants(tenants_file) if tenants_file else None,
+        mode=os.getenv('TENANT_MODE', 'single').lower()
+    )
+    return TenantCache(
+        factory, router,
+        max_tenants=int(os.getenv('TENANT_MAX_CACHED', '50')),
+        idle_timeout=float(os.getenv('TENANT_IDLE_TIMEOUT', '900')),
+        rate_per_minute=float(os.getenv('TENANT_RATE_PER_MINUTE', '20')),
+        burst=int(os.getenv('TENANT_RATE_BURST', '10'))
+    )
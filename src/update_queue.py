@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class UpdateDispatcher:
+    """
+    Fila limitada de updates do webhook, consumida por um número fixo de
+    workers. Cada chat é sempre atendido pelo mesmo worker, então as mensagens
+    de um chat são processadas (e gravadas) na ordem em que chegaram.
+    """
+
+    def __init__(self, process_fn, workers=32, max_size=512):
+        self.process_fn = process_fn
+        self.workers = workers
+        self.max_size = max_size
+
+        self._queues = [asyncio.Queue() for _ in range(workers)]
+        self._tasks = []
+
+        self._depth = 0
+        self._in_flight = 0
+        self._max_depth = 0
+        self._started = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(queue), name=f'update-worker-{i}')
+            for i, queue in enumerate(self._queues)
+        ]
+
+    def _queue_for(self, update):
+        chat = getattr(update, 'effective_chat', None)
+        key = chat.id if chat else getattr(update, 'update_id', 0)
+        return self._queues[hash(key) % self.workers]
+
+    def submit(self, update):
+        """Enfileira a update; retorna False se a fila estiver cheia"""
+        if self._depth >= self.max_size:
+            self._rejected += 1
+            logger.warning(f"Fila de updates cheia ({self._depth}), update recusada")
+            return False
+        self._depth += 1
+        self._max_depth = max(self._max_depth, self._depth)
+        self._queue_for(update).put_nowait((update, time.monotonic()))
+        return True
+
+    async def _worker(self, queue):
+        while True:
+            update, enqueued_at = await queue.get()
+            wait = time.monotonic() - enqueued_at
+            self._depth -= 1
+            self._in_flight += 1
+            self._started += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            try:
+                await self.process_fn(update)
+                self._processed += 1
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Erro ao processar update: {e}")
+            finally:
+                self._in_flight -= 1
+                queue.task_done()
+
+    def metrics(self):
+        return {
+            'workers': self.workers,
+            'max_size': self.max_size,
+            'queue_depth': self._depth,
+            'in_flight': self._in_flight,
+            'max_queue_depth': self._max_depth,
+            'processed': self._processed,
+            'failed': self._failed,
+            'rejected': self._rejected,
+            'avg_wait_ms': round(self._total_wait / self._started * 1000, 2) if self._started else 0.0,
+            'max_wait_ms': round(self._max_wait * 1000, 2),
+        }
+
+    async def close(self, timeout=10.0):
+        """Espera as updates já aceitas serem processadas e encerra os workers"""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._depth} updates descartadas no encerramento")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,116 @@
+import json
+import logging
+from aiohttp import web
+from telegram import Update
+from .update_queue import UpdateDispatcher
+from .metrics import CONTENT_TYPE, UPDATE_QUEUE_DEPTH, UPDATE_QUEUE_IN_FLIGHT, UPDATES, count_error, render
+
+logger = logging.getLogger(__name__)
+
+HOME_PAGE = """
+    <h1>🤖 Finance Controller Bot</h1>
+    <p><strong>Status:</strong> ✅ Online (Webhook Mode)</p>
+    <p><strong>Endpoints:</strong></p>
+    <ul>
+        <li><code>/health</code> - Health check</li>
+        <li><code>/metrics</code> - Métricas no formato do Prometheus</li>
+        <li><code>/webhook</code> - Webhook do Telegram</li>
+    </ul>
+    <p><em>Bot funcionando em modo webhook para deploy no Render.</em></p>
+    """
+
+def create_web_app(telegram_app, health_info=None, webhook_url=None, workers=32, max_queue=512, cleanup=None):
+    """
+    Servidor aiohttp no mesmo event loop da aplicação do Telegram. As updates
+    recebidas entram em uma fila limitada (UpdateDispatcher); com a fila cheia
+    o webhook responde 503 e o Telegram reenvia depois.
+    health_info é uma função opcional com dados extras para o /health.
+    cleanup é uma corrotina opcional chamada com a aplicação depois do
+    shutdown (o Application.shutdown não roda o post_shutdown).
+    """
+    dispatcher = UpdateDispatcher(telegram_app.process_update, workers=workers, max_size=max_queue)
+    UPDATE_QUEUE_DEPTH.set_function(lambda: dispatcher.metrics()['queue_depth'])
+    UPDATE_QUEUE_IN_FLIGHT.set_function(lambda: dispatcher.metrics()['in_flight'])
+    UPDATES.set_function(lambda: {(result,): dispatcher.metrics()[result] for result in ('processed', 'failed', 'rejected')})
+
+    async def home(request):
+        return web.Response(text=HOME_PAGE, content_type='text/html')
+
+    async def health_check(request):
+        """Health check para o Render saber que o serviço está ativo"""
+        body = {
+            'status': 'healthy',
+            'service': 'Finance Controller Bot',
+            'mode': 'webhook',
+            'update_queue': dispatcher.metrics(),
+        }
+        if health_info:
+            body.update(health_info())
+        return web.json_response(body)
+
+    async def metrics(request):
+        return web.Response(body=render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    async def webhook(request):
+        """Endpoint que recebe mensagens do Telegram via webhook"""
+        try:
+            update_data = await request.json()
+        except json.JSONDecodeError:
+            update_data = None
+
+        if not update_data:
+            logger.warning("Webhook chamado sem dados")
+            return web.json_response({'status': 'no_data'}, status=400)
+
+        try:
+            update = Update.de_json(update_data, telegram_app.bot)
+            if not dispatcher.submit(update):
+                return web.json_response({'status': 'busy'}, status=503, headers={'Retry-After': '1'})
+            return web.json_response({'status': 'ok'})
+        except Exception as e:
+            logger.error(f"Erro no webhook: {e}")
+            count_error('webhook', e)
+            return web.json_response({'status': 'error', 'message': str(e)}, status=500)
+
+    async def set_webhook(request):
+        """Endpoint para configurar o webhook do Telegram (apenas para setup)"""
+        try:
+            data = await request.json()
+            url = data.get('webhook_url') if isinstance(data, dict) else None
+            if not url:
+                return web.json_response({'error': 'webhook_url é obrigatório'}, status=400)
+
+            await telegram_app.bot.set_webhook(url)
+            return web.json_response({'status': 'webhook_set', 'url': url})
+        except Exception as e:
+            logger.error(f"Erro ao configurar webhook: {e}")
+            return web.json_response({'error': str(e)}, status=500)
+
+    async def on_startup(app):
+        await telegram_app.initialize()
+        await telegram_app.start()
+        dispatcher.start()
+        if webhook_url:
+            try:
+                logger.info(f"Configurando webhook para: {webhook_url}")
+                await telegram_app.bot.set_webhook(webhook_url)
+                logger.info("✅ Webhook configurado com sucesso!")
+            except Exception as e:
+                logger.error(f"Erro ao configurar webhook: {e}")
+
+    async def on_cleanup(app):
+        await dispatcher.close()
+        await telegram_app.stop()
+        await telegram_app.shutdown()
+        if cleanup:
+            await cleanup(telegram_app)
+
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/health', health_check)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_post('/webhook', webhook)
+    app.router.add_post('/set_webhook', set_webhook)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.google_sheets import GoogleSheetsManager
+
+class JournalOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        # O buffer só grava no flush() explícito do teste
+        environ = mock.patch.dict(os.environ, {'SHEETS_BATCH_SIZE': '1000', 'SHEETS_BATCH_MAX_AGE': '3600'})
+        environ.start()
+        self.addCleanup(environ.stop)
+        self.manager = GoogleSheetsManager('S', 'Gastos', journal_path=os.path.join(self.directory.name, 'journal.jsonl'))
+        self.written = []
+        self.manager.write_buffer._flush_fn = self.written.extend
+
+    def tearDown(self):
+        self.manager.close()
+        self.directory.cleanup()
+
+    def test_ack_does_not_cover_rows_outside_the_buffer(self):
+        journal = self.manager.journal
+        write = journal.write
+        enqueue_lock = self.manager._enqueue_lock
+        seq_taken, proceed, second_waiting = threading.Event(), threading.Event(), threading.Event()
+        accepted = []
+
+        def slow_write(rows, key=None):
+            # O primeiro escritor para entre a gravação no diário e o add no buffer
+            seq, record = write(rows, key)
+            accepted.extend(rows)
+            if key == 'u:1':
+                seq_taken.set()
+                proceed.wait(5)
+            return seq, record
+
+        class WatchedLock:
+            # Avisa quando o segundo escritor chega ao lock do enqueue
+            def __enter__(self):
+                if threading.current_thread() is second:
+                    second_waiting.set()
+                enqueue_lock.acquire()
+
+            def __exit__(self, *exc_info):
+                enqueue_lock.release()
+
+        journal.write = slow_write
+        self.manager._enqueue_lock = WatchedLock()
+        first = threading.Thread(target=self.manager.add_rows, args=([['1']], 'u:1'))
+        second = threading.Thread(target=self.manager.add_rows, args=([['2']], 'u:2'))
+        first.start()
+        self.assertTrue(seq_taken.wait(5))
+        second.start()
+        self.assertTrue(second_waiting.wait(5))
+
+        self.manager.write_buffer.flush()
+        pending = [row for _, rows in journal.pending() for row in rows]
+        try:
+            for row in accepted:
+                self.assertTrue(row in self.written or row in pending, f"{row} saiu do diário sem ser gravado")
+        finally:
+            proceed.set()
+        first.join()
+        second.join()
+        self.manager._enqueue_lock = enqueue_lock
+        self.manager.write_buffer.flush()
+        self.assertEqual(self.written, [['1'], ['2']])
+        self.assertEqual(journal.pending(), [])
+
+    def test_fsync_runs_outside_the_enqueue_lock(self):
+        journal = self.manager.journal
+        sync = journal.sync
+        locked = []
+
+        def checked_sync(record):
+            # Escritores simultâneos precisam entrar no buffer enquanto este espera o fsync
+            locked.append(self.manager._enqueue_lock.locked())
+            sync(record)
+
+        journal.sync = checked_sync
+        self.manager.add_rows([['1']], 'u:1')
+        self.manager.write_buffer.flush()
+        self.assertEqual(locked, [False])
+        self.assertEqual(self.written, [['1']])
+
+if __name__ == '__main__':
+    unittest.main()